@@ -0,0 +1,192 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_bank.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Bank of precomputed valid layouts for a board size and fleet, in a binary file of fixed-width records
+       (the mask of every ship). The file is memory-mapped, so a layout is picked by its index without reading
+       the rest, and the processes that open the same bank share its pages.
+       Example: python battleship_bank.py layouts_10.bslb --size 10 --count 200000
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import os
+import mmap
+import time
+import struct
+import random
+import argparse
+
+import battleship_engine
+import battleship_layouts
+from battleship_layouts import mask_bytes, mask_to_bytes, mask_from_bytes
+
+
+# -------------------------------- BANK FORMAT -------------------------------- #
+
+# Header: magic, version, board size, number of boat lengths in the fleet, number of layouts.
+# Then (length, count) per boat length and one record per layout: the masks of its ships in the order of
+# fleet_lengths() (longest first), each one as a big-endian bitmask of the board
+MAGIC = b'BSLB'
+VERSION = 1
+HEADER = struct.Struct('>4sBBBI')
+FLEET_ENTRY = struct.Struct('>BH')
+
+
+class BankError(Exception):
+    pass
+
+
+# -------------------------------- BANK -------------------------------- #
+
+class LayoutBank(object):
+    '''
+    Read-only view of a bank file. ships() gives the layout of a record as a list of ship masks,
+    ready for Board.set_ships()
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as bank_file:
+            try:
+                self.data = mmap.mmap(bank_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BankError('Empty layout bank')
+
+        try:
+            magic, version, size, n_lengths, count = HEADER.unpack_from(self.data, 0)
+        except struct.error:
+            raise BankError('Not a battleship layout bank')
+        if magic != MAGIC or version != VERSION:
+            raise BankError('Not a battleship layout bank (or not of version {})'.format(VERSION))
+        offset = HEADER.size
+
+        fleet = {}
+        for _ in range(n_lengths):
+            length, boat_count = FLEET_ENTRY.unpack_from(self.data, offset)
+            fleet['{}_boat'.format(length)] = boat_count
+            offset += FLEET_ENTRY.size
+
+        self.size = size
+        self.fleet = fleet
+        self.count = count
+        self.n_bytes = mask_bytes(size)
+        self.n_ships = len(battleship_layouts.fleet_lengths(fleet))
+        self.record_size = self.n_ships * self.n_bytes
+        self.start = offset  # Offset of the first record
+
+        if len(self.data) < self.start + count * self.record_size:
+            raise BankError('Truncated layout bank')
+
+    def __len__(self):
+        return self.count
+
+    def matches(self, size, boats):
+        return self.size == size and self.fleet == dict((key, count) for key, count in boats.items() if count)
+
+    def ships(self, index):
+        n_bytes = self.n_bytes
+        offset = self.start + index * self.record_size
+        return [mask_from_bytes(self.data[start:start + n_bytes])
+                for start in range(offset, offset + self.record_size, n_bytes)]
+
+    def layout(self, index):
+        layout = 0
+        for ship in self.ships(index):
+            layout |= ship
+        return layout
+
+    def close(self):
+        self.data.close()
+
+
+_banks = {}
+
+
+def open_bank(path):
+    '''
+    The bank of the file, mapped once per process
+    '''
+    path = os.path.abspath(path)
+    if path not in _banks:
+        _banks[path] = LayoutBank(path)
+    return _banks[path]
+
+
+# -------------------------------- BUILDING -------------------------------- #
+
+def build(path, size, boats, count, rng=random, max_misses=None):
+    '''
+    Writes a bank of up to count different random layouts. Generation stops early when max_misses layouts in a row
+    are already in the bank (small boards have few layouts). Returns the number of layouts written
+    '''
+    boats = dict((key, boat_count) for key, boat_count in boats.items() if boat_count)
+    lengths = sorted(int(boat_key.split('_')[0]) for boat_key in boats)
+    n_bytes = mask_bytes(size)
+    max_misses = max_misses if max_misses is not None else max(1000, count // 10)
+
+    seen = set()
+    records = []
+    misses = 0
+    while len(records) < count and misses < max_misses:
+        ships = battleship_layouts.random_fleet(size, boats, rng)
+        layout = 0
+        for ship in ships:
+            layout |= ship
+
+        # Boats never touch, so the layout alone tells its ships apart
+        if layout in seen:
+            misses += 1
+            continue
+        misses = 0
+        seen.add(layout)
+        records.append(b''.join(mask_to_bytes(ship, n_bytes) for ship in ships))
+
+    if len(records) < 2:
+        raise BankError('The fleet {} has less than two layouts on a {}x{} board'.format(boats, size, size))
+
+    with open(path, 'wb') as bank_file:
+        bank_file.write(HEADER.pack(MAGIC, VERSION, size, len(lengths), len(records)))
+        for length in lengths:
+            bank_file.write(FLEET_ENTRY.pack(length, boats['{}_boat'.format(length)]))
+        for record in records:
+            bank_file.write(record)
+
+    return len(records)
+
+
+# -------------------------------- COMMAND LINE -------------------------------- #
+
+def main():
+    parser = argparse.ArgumentParser(description='Precomputes a bank of valid battleship layouts')
+    parser.add_argument('bank', help='file to write')
+    parser.add_argument('--size', type=int, default=10,
+                        help='squares on the board side, the 10x10 fleet is scaled to the area of the board')
+    parser.add_argument('--count', type=int, default=100000, help='different layouts to generate')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the layouts')
+    args = parser.parse_args()
+
+    fleet = battleship_layouts.scaled_fleet(battleship_engine.boatDict, args.size)
+    start = time.time()
+    written = build(args.bank, args.size, fleet, args.count, random.Random(args.seed))
+
+    bank = LayoutBank(args.bank)
+    print('{0}x{0} board | {1} layouts ({2} bytes each, {3} bytes) in {4:.1f}s'.format(
+        bank.size, written, bank.record_size, os.path.getsize(args.bank), time.time() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_density.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Probability-density strategy for COM. Every legal placement of the boats still afloat is counted
+       with NumPy array operations, and COM fires at the coord covered by most of them
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import battleship_engine
+from battleship_engine import USER
+from battleship_layouts import mask_bytes, mask_to_bytes
+
+
+# -------------------------------- MASKS AS ARRAYS -------------------------------- #
+
+def mask_to_array(mask, size):
+    '''
+    Bitmask of the board as a (size, size) boolean array
+    '''
+    cells = size * size
+    raw = mask_to_bytes(mask, mask_bytes(size))
+
+    # Bytes come from the highest one, and unpackbits starts every byte by its highest bit
+    bits = numpy.unpackbits(numpy.frombuffer(raw, dtype=numpy.uint8)[::-1]).reshape(-1, 8)[:, ::-1].ravel()
+    return bits[:cells].reshape(size, size).astype(bool)
+
+
+def row_density(blocked, hits, length, hit_weight):
+    '''
+    Weight that every coord receives from the horizontal placements of a boat of the given length.
+    The placements of all the rows are counted at once with cumulative sums over the windows of the board
+    '''
+    rows, columns = blocked.shape
+
+    blocked_sums = numpy.zeros((rows, columns + 1))
+    blocked_sums[:, 1:] = numpy.cumsum(blocked, axis=1)
+    hit_sums = numpy.zeros((rows, columns + 1))
+    hit_sums[:, 1:] = numpy.cumsum(hits, axis=1)
+
+    # One window per placement: it is legal if it does not cover any blocked coord
+    blocked_in_window = blocked_sums[:, length:] - blocked_sums[:, :-length]
+    hits_in_window = hit_sums[:, length:] - hit_sums[:, :-length]
+    weights = numpy.where(blocked_in_window == 0, 1 + hit_weight * hits_in_window, 0)
+
+    # Every placement spreads its weight over its coords
+    spread = numpy.zeros((rows, columns + 1))
+    spread[:, :columns - length + 1] += weights
+    spread[:, length:] -= weights
+    return numpy.cumsum(spread, axis=1)[:, :columns]
+
+
+# -------------------------------- TARGETING -------------------------------- #
+
+class DensityStrategy(battleship_engine.Strategy):
+    '''
+    Fires at the coord covered by most placements. It returns None (so COM goes back to its usual heuristic)
+    when NumPy is not available or when the time budget of the decision runs out
+    '''
+
+    name = 'density'
+
+    def __init__(self, time_budget=0.05, hit_weight=50):
+        self.time_budget = time_budget  # Seconds per shot
+        self.hit_weight = hit_weight  # Extra weight of the placements that cover hits of boats still afloat
+
+    def density(self, game, deadline=None):
+        board = game.board
+        size = board.size
+
+        blocked = mask_to_array(board.discarded | board.water(USER), size)
+        hits = mask_to_array(board.hits(USER) & ~board.discarded, size)
+
+        density = numpy.zeros((size, size))
+        for boat_key, count in game.boats.items():
+            length = int(boat_key.split('_')[0])
+            if count <= 0 or length > size:
+                continue
+
+            density += count * row_density(blocked, hits, length, self.hit_weight)
+            density += count * row_density(blocked.T, hits.T, length, self.hit_weight).T
+
+            if deadline is not None and battleship_engine.timer() > deadline:
+                return None
+
+        density[mask_to_array(board.revealed[USER], size)] = 0
+        return density
+
+    def choose(self, game, last_hit, deadline=None):
+        if numpy is None:
+            return None
+
+        density = self.density(game, deadline)
+        if density is None or density.max() <= 0:
+            return None
+
+        best = numpy.flatnonzero(density.ravel() == density.max())
+        return int(best[game.rng.randrange(len(best))])
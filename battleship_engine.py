@@ -0,0 +1,870 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_engine.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Headless rules of the battleship game (board, fleet, shots, win detection and COM turn logic).
+       It does not import nuke: renderers subscribe to the game and draw the results
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import copy
+import time
+import random
+from collections import namedtuple, deque
+
+import battleship_layouts
+
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+# -------------------------------- SIDES -------------------------------- #
+
+# IDs that will be used when calling most methods in this module:
+USER = 1
+COM = 0
+
+
+# -------------------------------- FLEET -------------------------------- #
+
+# Dictionary of boats in this configuration (10x10)
+boatDict = {'5_boat': 1, '4_boat': 1, '3_boat': 2, '2_boat': 1}
+
+def row_label(row):
+    # A to Z, then AA, AB... like the columns of a spreadsheet
+    label = ''
+    row += 1
+    while row:
+        row, remainder = divmod(row - 1, 26)
+        label = chr(65 + remainder) + label
+    return label
+
+
+def cell_name(row, column):
+    return row_label(row) + str(column + 1)
+
+
+# -------------------------------- BITMASKS -------------------------------- #
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def iter_bits(mask):
+    '''
+    Indexes of the bits set in the mask, from the lowest one
+    '''
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# -------------------------------- BOARD STATE -------------------------------- #
+
+class BoardState(namedtuple('BoardState', ['boats', 'revealed', 'discarded', 'boat_count', 'hit_count'])):
+    '''
+    Immutable snapshot of a board (pairs indexed by COM/USER). Its masks are integers, so taking one costs
+    the same on any board
+    '''
+
+    __slots__ = ()
+
+    def hits_left(self, id):
+        return self.boat_count[id] - self.hit_count[id]
+
+    def is_over(self):
+        return self.hits_left(USER) == 0 or self.hits_left(COM) == 0
+
+
+# -------------------------------- BOARD -------------------------------- #
+
+class Board(object):
+    '''
+    State of both sides of the board, stored as integer bitmasks (one bit per coord).
+    Cells are addressed by their flat index (row * size + column)
+    '''
+
+    def __init__(self, size):
+
+        self.size = size
+        self.cells = size * size
+
+        # Masks per side, indexed by COM/USER
+        self.boats = [0, 0]
+        self.revealed = [0, 0]
+
+        # Counters per side, so the end of the game is known without counting bits
+        self.boat_count = [0, 0]
+        self.hit_count = [0, 0]
+
+        # Ships per side: their masks and lengths, the ship of every coord with a boat and the hits of every ship,
+        # so a shot knows at once if it has sunk a ship
+        self.ships = [[], []]
+        self.ship_lengths = [[], []]
+        self.ship_of = [{}, {}]
+        self.ship_hits = [[], []]
+
+        # COM's own bookkeeping of the USER side: coords that can not hold a boat anymore
+        self.discarded = 0
+
+        # Constant masks used to shift coords without wrapping around the edges of the board
+        self.full = (1 << self.cells) - 1
+        first_column = 0
+        for row in range(size):
+            first_column |= 1 << (row * size)
+        self.first_column = first_column
+        self.last_column = first_column << (size - 1)
+
+    def index(self, row, column):
+        return row * self.size + column
+
+    def position(self, cell):
+        return divmod(cell, self.size)
+
+    def get_has_boat(self, id, cell):
+        return bool(self.boats[id] >> cell & 1)
+
+    def set_has_boat(self, id, cell):
+        self.add_boats(id, 1 << cell)
+
+    def add_boats(self, id, mask):
+        # Ships are told apart as the groups of coords that touch each other (boats never touch)
+        self.set_ships(id, self.split_ships(self.boats[id] | mask))
+
+    def set_ships(self, id, ships):
+        '''
+        Boats of a side, given ship by ship
+        '''
+        ship_of = {}
+        boats = 0
+        for number, ship in enumerate(ships):
+            boats |= ship
+            for cell in iter_bits(ship):
+                ship_of[cell] = number
+
+        self.boats[id] = boats
+        self.ships[id] = list(ships)
+        self.ship_lengths[id] = [popcount(ship) for ship in ships]
+        self.ship_of[id] = ship_of
+        self.boat_count[id] = popcount(boats)
+        self.count_hits(id)
+
+    def count_hits(self, id):
+        revealed = self.revealed[id]
+        self.ship_hits[id] = [popcount(ship & revealed) for ship in self.ships[id]]
+        self.hit_count[id] = popcount(self.boats[id] & revealed)
+
+    def split_ships(self, mask):
+        ships = []
+        while mask:
+            ship = mask & -mask
+            while True:
+                grown = (ship | self.neighbours(ship)) & mask
+                if grown == ship:
+                    break
+                ship = grown
+
+            ships.append(ship)
+            mask &= ~ship
+        return ships
+
+    def sunk_ship(self, id, cell):
+        '''
+        Mask of the ship at the coord if all of its coords have been hit, 0 otherwise
+        '''
+        number = self.ship_of[id].get(cell)
+        if number is None or self.ship_hits[id][number] < self.ship_lengths[id][number]:
+            return 0
+        return self.ships[id][number]
+
+    def state(self):
+        return BoardState(tuple(self.boats), tuple(self.revealed), self.discarded, tuple(self.boat_count),
+                          tuple(self.hit_count))
+
+    def set_state(self, state):
+        # The ships stay the same, their hits are counted again
+        self.boats = list(state.boats)
+        self.revealed = list(state.revealed)
+        self.discarded = state.discarded
+        self.boat_count = list(state.boat_count)
+        self.count_hits(COM)
+        self.count_hits(USER)
+
+    def get_is_revealed(self, id, cell):
+        return bool(self.revealed[id] >> cell & 1)
+
+    def set_is_revealed(self, id, cell):
+        bit = 1 << cell
+        if self.revealed[id] & bit:
+            return
+
+        self.revealed[id] |= bit
+        if self.boats[id] & bit:
+            self.hit_count[id] += 1
+            self.ship_hits[id][self.ship_of[id][cell]] += 1
+
+    def get_is_discarded(self, cell):
+        return bool(self.discarded >> cell & 1)
+
+    def set_is_discarded(self, cell):
+        self.discarded |= 1 << cell
+
+    # MASK QUERIES
+    def hits(self, id):
+        return self.boats[id] & self.revealed[id]
+
+    def water(self, id):
+        return self.revealed[id] & ~self.boats[id]
+
+    def hits_left(self, id):
+        return self.boat_count[id] - self.hit_count[id]
+
+    def all_boats_revealed(self, id):
+        return self.hit_count[id] == self.boat_count[id]
+
+    def shift(self, mask, d_row, d_column):
+        '''
+        Mask moved by one coord in the given direction, dropping the coords that leave the board
+        '''
+        if d_column == 1:
+            mask = (mask & ~self.last_column) << 1
+        elif d_column == -1:
+            mask = (mask & ~self.first_column) >> 1
+        if d_row == 1:
+            mask = mask << self.size
+        elif d_row == -1:
+            mask = mask >> self.size
+        return mask & self.full
+
+    def neighbours(self, mask):
+        '''
+        Coords that touch (not diagonally) any of the coords of the mask
+        '''
+        return self.shift(mask, 0, 1) | self.shift(mask, 0, -1) | self.shift(mask, 1, 0) | self.shift(mask, -1, 0)
+
+    def neighbour(self, cell, d_row, d_column):
+        '''
+        Index of the coord placed at the given offset, None if it falls out of the board
+        '''
+        row, column = self.position(cell)
+        if 0 <= row + d_row < self.size and 0 <= column + d_column < self.size:
+            return self.index(row + d_row, column + d_column)
+        return None
+
+    def line(self, cell, d_row, d_column, length):
+        '''
+        Mask of the coords that go from the given one in the given direction, None if it leaves the board
+        '''
+        row, column = self.position(cell)
+        end_row = row + d_row * (length - 1)
+        end_column = column + d_column * (length - 1)
+        if not (0 <= end_row < self.size and 0 <= end_column < self.size):
+            return None
+
+        step = d_row * self.size + d_column
+        mask = 0
+        for N in range(length):
+            mask |= 1 << (cell + step * N)
+        return mask
+
+
+# -------------------------------- LISTENERS -------------------------------- #
+
+# Result of a shot. 'side' is the board that receives the fire, 'streak' counts the previous shots of the same turn,
+# 'previous' is the coord whose adjacents were used to choose this one (COM only), 'sunk' is the mask of the ship
+# it has sunk (0 if none) and 'overrun' is None, or whether the target of COM's strategy was still played when its
+# choice of this shot went over the time budget
+Shot = namedtuple('Shot', ['side', 'row', 'column', 'hit', 'streak', 'previous', 'sunk', 'overrun'])
+
+
+class GameListener(object):
+    '''
+    Interface for the objects that react to the game (renderers, loggers...)
+    '''
+
+    def on_shot(self, game, shot):
+        pass
+
+    def on_turn(self, game, shots):
+        '''
+        All the shots of a COM turn, in order. Listeners that draw the whole turn at once override this
+        '''
+        for shot in shots:
+            self.on_shot(game, shot)
+
+    def on_boat_discarded(self, game, cells, length):
+        pass
+
+    def on_undo(self, game, state):
+        '''
+        The game went back to a snapshot. 'state' is the BoardState before the undo, to tell the coords that changed
+        '''
+        pass
+
+    def on_strategy_changed(self, game):
+        pass
+
+    def on_game_over(self, game, winner):
+        pass
+
+
+# -------------------------------- CANDIDATES -------------------------------- #
+
+class CandidatePool(object):
+    '''
+    Set of coords with removal and random choice in logarithmic time (a binary indexed tree of the coords left).
+    The coords are always kept in the same order, so COM's choices only depend on which coords are left:
+    a game put back from its masks (saved, resumed or undone) goes on exactly as it would have
+    '''
+
+    def __init__(self, cells, n_cells):
+        self.n_cells = n_cells
+        self.present = bytearray(n_cells)
+        self.count = 0
+
+        tree = [0] * (n_cells + 1)
+        for cell in cells:
+            if not self.present[cell]:
+                self.present[cell] = 1
+                tree[cell + 1] += 1
+                self.count += 1
+
+        for node in range(1, n_cells + 1):
+            parent = node + (node & -node)
+            if parent <= n_cells:
+                tree[parent] += tree[node]
+        self.tree = tree
+
+        self.top = 1
+        while self.top * 2 <= n_cells:
+            self.top *= 2
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, cell):
+        return bool(self.present[cell])
+
+    def copy(self):
+        other = CandidatePool((), 0)
+        other.n_cells = self.n_cells
+        other.present = bytearray(self.present)
+        other.count = self.count
+        other.tree = list(self.tree)
+        other.top = self.top
+        return other
+
+    def remove(self, cell):
+        if not self.present[cell]:
+            return
+
+        self.present[cell] = 0
+        self.count -= 1
+        tree = self.tree
+        node = cell + 1
+        while node <= self.n_cells:
+            tree[node] -= 1
+            node += node & -node
+
+    def choice(self, rng):
+        # The coord of a random rank, found walking down the tree
+        rank = rng.randrange(self.count)
+        tree = self.tree
+        position = 0
+        step = self.top
+        while step:
+            node = position + step
+            if node <= self.n_cells and tree[node] <= rank:
+                position = node
+                rank -= tree[node]
+            step //= 2
+        return position
+
+
+# -------------------------------- STRATEGIES -------------------------------- #
+
+class Strategy(object):
+    '''
+    How COM chooses its shots: observe() receives every shot at USER once it is resolved, and choose() returns the
+    next coord to fire at, or None to let the heuristic choose it. Every decision is held to time_budget seconds
+    (None for no limit): the deadline is given to choose(), and once a decision goes over it the heuristic plays
+    the rest of the turn. This base class is the heuristic: next to the last hit (continue), next to any hit of
+    a boat still afloat (target), or anywhere (hunt)
+    '''
+
+    name = 'heuristic'
+    time_budget = None
+
+    def observe(self, game, shot):
+        pass
+
+    def copy(self):
+        '''
+        Strategy with its own state, for a copy of the game (see Game.copy()). The heuristic has none
+        '''
+        return self if self is HEURISTIC else copy.deepcopy(self)
+
+    def choose(self, game, last_hit, deadline=None):
+        target = game.follow_hits(last_hit)
+        if target is None:
+            target = game.hunt()
+        return target
+
+
+HEURISTIC = Strategy()
+
+
+# -------------------------------- GAME -------------------------------- #
+
+class Game(object):
+
+    def __init__(self, size=10, boats=None, rng=None, strategy=None, undo_depth=10, bank=None):
+
+        self.board = Board(size)
+        self.fleet = dict(boatDict if boats is None else boats)  # Boats of every side
+        self.boats = dict(self.fleet)  # Boats of USER that COM has not discarded yet
+        self.rng = rng if rng is not None else random.Random()
+        self.listeners = []
+
+        # Precomputed layouts set_board() picks from (a LayoutBank of battleship_bank), None to generate them
+        if bank is not None and not bank.matches(size, self.fleet):
+            raise ValueError('The layout bank is not of a {0}x{0} board with the fleet {1}'.format(size, self.fleet))
+        self.bank = bank
+
+        # Strategy that chooses COM's shots (the heuristic by default)
+        self.strategy = strategy if strategy is not None else HEURISTIC
+        self.budget_overruns = 0  # Decisions of the strategy that went over its time budget
+
+        # Replays: the decisions that went over the time budget when the game was recorded, by shot number, and
+        # whether the target of the strategy was still played. Nothing is timed then
+        self.replayed_overruns = None
+
+        # COM's live targeting state, updated as every shot at USER resolves
+        self.candidates = CandidatePool(range(self.board.cells), self.board.cells)  # Not revealed and not discarded
+        self.open_hits = set()  # Hits that do not belong to a discarded boat yet
+
+        self.shot_count = 0  # Shots of both sides so far
+        self.history = deque(maxlen=undo_depth)  # Snapshots of the last turns, for undo()
+
+    # LISTENERS
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    # STRATEGY
+    def set_strategy(self, strategy):
+        # Strategy for the next turns of COM (a recorded game keeps track of the change)
+        self.strategy = strategy
+        for listener in self.listeners:
+            listener.on_strategy_changed(self)
+
+    # BOARD SETTING
+    def set_layouts(self, user_layout, com_layout):
+        '''
+        Layouts given as matrices of 0/1 (rows of the board)
+        '''
+        self.set_layout_masks(battleship_layouts.layout_from_matrix(user_layout),
+                              battleship_layouts.layout_from_matrix(com_layout))
+
+    def set_layout_masks(self, user_layout, com_layout):
+        self.board.add_boats(USER, user_layout)
+        self.board.add_boats(COM, com_layout)
+
+    def set_board(self, attempts=100):
+        # Random valid layouts, different for each side, that come ship by ship
+        if not any(self.fleet.values()):
+            raise ValueError('No boat fits on a {0}x{0} board'.format(self.board.size))
+
+        if self.bank is not None:
+            user_index = self.rng.randrange(len(self.bank))
+            com_index = self.rng.randrange(len(self.bank) - 1)
+            if com_index >= user_index:
+                com_index += 1
+
+            self.board.set_ships(USER, self.bank.ships(user_index))
+            self.board.set_ships(COM, self.bank.ships(com_index))
+            return
+
+        for _ in range(attempts):
+            user_ships = battleship_layouts.random_fleet(self.board.size, self.fleet, self.rng)
+            com_ships = battleship_layouts.random_fleet(self.board.size, self.fleet, self.rng)
+
+            if sorted(user_ships) != sorted(com_ships):
+                break
+        else:
+            raise ValueError('The fleet {} has a single layout on a {}x{} board'.format(self.fleet, self.board.size,
+                                                                                    self.board.size))
+
+        self.board.set_ships(USER, user_ships)
+        self.board.set_ships(COM, com_ships)
+
+    def restore(self, boats, revealed, discarded, boats_left):
+        '''
+        Puts a saved game back: boat and revealed masks per side, COM's discarded mask and the boats it still
+        looks for. COM's targeting state is rebuilt from them
+        '''
+        board = self.board
+        board.revealed = list(revealed)
+        board.boats = [0, 0]
+        board.add_boats(COM, boats[COM])
+        board.add_boats(USER, boats[USER])
+        board.discarded = discarded
+
+        self.boats = dict(boats_left)
+        self.shot_count = popcount(board.revealed[USER]) + popcount(board.revealed[COM])
+        self.rebuild_targeting()
+
+    def rebuild_targeting(self):
+        board = self.board
+        self.candidates = CandidatePool(iter_bits(board.full & ~board.revealed[USER] & ~board.discarded), board.cells)
+        self.open_hits = set(iter_bits(board.hits(USER) & ~board.discarded))
+
+    # SNAPSHOTS
+    def snapshot(self):
+        '''
+        Everything that changes during a turn: the board state (masks shared, not copied), the boats COM still
+        looks for, COM's random generator and the number of shots
+        '''
+        return (self.board.state(), tuple(sorted(self.boats.items())), self.rng.getstate(), self.shot_count)
+
+    def checkpoint(self):
+        self.history.append(self.snapshot())
+
+    def can_undo(self):
+        return bool(self.history)
+
+    def undo(self):
+        '''
+        Goes back to the last checkpoint (the start of the last turn of USER). Returns False if there is none
+        '''
+        if not self.history:
+            return False
+
+        state, boats, rng_state, shot_count = self.history.pop()
+        previous_state = self.board.state()
+
+        self.board.set_state(state)
+        self.boats = dict(boats)
+        self.rng.setstate(rng_state)
+        self.shot_count = shot_count
+        self.rebuild_targeting()
+
+        for listener in self.listeners:
+            listener.on_undo(self, previous_state)
+        return True
+
+    def copy(self):
+        '''
+        Independent game in the same state, with copies of COM's random generator and strategy and no listeners nor
+        history, so a turn of COM can be played on it aside (see apply_turn())
+        '''
+        rng = random.Random()
+        rng.setstate(self.rng.getstate())
+
+        other = Game(self.board.size, self.fleet, rng, self.strategy.copy(), self.history.maxlen, self.bank)
+        for id in (COM, USER):
+            other.board.set_ships(id, self.board.ships[id])
+        other.board.set_state(self.board.state())
+        other.boats = dict(self.boats)
+        other.candidates = self.candidates.copy()
+        other.open_hits = set(self.open_hits)
+        other.shot_count = self.shot_count
+        return other
+
+    # SHOT RESOLUTION
+    def fire(self, id, cell, streak=0, previous=None):
+        shot = self.resolve(id, cell, streak, previous)
+        for listener in self.listeners:
+            listener.on_shot(self, shot)
+
+        return shot.hit
+
+    def resolve(self, id, cell, streak=0, previous=None, overrun=None, observed=False):
+        '''
+        Reveals the cell and updates COM's bookkeeping, without notifying the listeners of the shot.
+        observed: the strategy has already seen the shot (it was played on a copy of the game)
+        '''
+        board = self.board
+        board.set_is_revealed(id, cell)
+        hit = board.get_has_boat(id, cell)
+        sunk = board.sunk_ship(id, cell) if hit else 0
+        self.shot_count += 1
+
+        row, column = board.position(cell)
+        shot = Shot(id, row, column, hit, streak, previous, sunk, overrun)
+
+        if id == USER:
+            self.observe(cell, hit, sunk)
+            if not observed:
+                self.strategy.observe(self, shot)
+
+        return shot
+
+    def game_is_over(self):
+        return self.board.hits_left(USER) == 0 or self.board.hits_left(COM) == 0
+
+    def winner(self):
+        if self.board.all_boats_revealed(USER):
+            return COM
+        if self.board.all_boats_revealed(COM):
+            return USER
+        return None
+
+    def end_game(self):
+        winner = self.winner()
+        for listener in self.listeners:
+            listener.on_game_over(self, winner)
+
+    # TURNS
+    def user_fires(self, row, column, com_turn=True):
+        '''
+        Shot of USER. After a miss COM plays its turn, unless com_turn is False (it is then played elsewhere)
+        '''
+        self.checkpoint()
+        hit = self.fire(COM, self.board.index(row, column))
+
+        if hit:
+            if self.game_is_over():
+                self.end_game()
+        elif com_turn:
+            self.com_fires()
+
+        return hit
+
+    def com_fires(self):
+        '''
+        Plays a whole COM turn and returns its shots, in order. COM keeps firing while it hits, at the coords
+        chosen by its strategy. The listeners receive the turn once it is over
+        '''
+        board = self.board
+        strategy = self.strategy
+
+        shots = []
+        last_hit = None  # Last hit of the turn
+        over_budget = False  # The strategy went over its time budget, the heuristic plays the rest of the turn
+
+        while not self.game_is_over():
+            target = None
+            overrun = None
+
+            if not over_budget:
+                budget = strategy.time_budget
+                if self.replayed_overruns is not None and self.shot_count in self.replayed_overruns:
+                    # The recorded decision went over budget: it only finishes if it did then (0 is a deadline
+                    # already gone)
+                    overrun = self.replayed_overruns[self.shot_count]
+                    target = strategy.choose(self, last_hit, None if overrun else 0)
+                    over_budget = True
+                elif budget is None or self.replayed_overruns is not None:
+                    target = strategy.choose(self, last_hit)
+                else:
+                    start = timer()
+                    target = strategy.choose(self, last_hit, start + budget)
+                    if timer() - start > budget:
+                        self.budget_overruns += 1
+                        if strategy is not HEURISTIC:
+                            over_budget = True
+                            overrun = target is not None
+
+            if target is None:
+                target = HEURISTIC.choose(self, last_hit)
+
+            # Shots next to the last hit are said to come from it
+            previous = None
+            if last_hit is not None and board.neighbours(1 << last_hit) >> target & 1:
+                previous = board.position(last_hit)
+
+            shot = self.resolve(USER, target, len(shots), previous, overrun)
+            shots.append(shot)
+            if not shot.hit:
+                break
+
+            last_hit = target
+
+        self.notify_turn(shots)
+
+        if self.game_is_over():
+            self.end_game()
+
+        return shots
+
+    def follow_hits(self, last_hit=None):
+        '''
+        Coord next to the last hit (continue) or next to the highest hit that can still be extended (target),
+        None if no hit can be followed
+        '''
+        if last_hit is not None:
+            target = self.calculate_adjacent(last_hit)
+            if target is not None:
+                return target
+
+        for cell in sorted(self.open_hits, reverse=True):
+            if self.free_adjacents(cell):
+                return self.calculate_adjacent(cell)
+
+        return None
+
+    def hunt(self):
+        # Any coord that may still hide a boat
+        if len(self.candidates):
+            return self.candidates.choice(self.rng)
+        return self.rng.choice(list(iter_bits(self.board.full & ~self.board.revealed[USER])))
+
+    def apply_turn(self, shots, rng_state=None, strategy=None):
+        '''
+        Plays shots of COM chosen on a copy of the game, and notifies them as a turn. A long turn can be applied
+        in several parts: the state of the random generator of the copy comes with the last one, and the end of
+        the game is only checked then. The strategy of the copy has already observed the shots: it comes back with
+        the last part and takes the place of the strategy of this game
+        '''
+        board = self.board
+        resolved = [self.resolve(USER, board.index(shot.row, shot.column), shot.streak, shot.previous, shot.overrun,
+                                 observed=True) for shot in shots]
+        self.notify_turn(resolved)
+
+        if strategy is not None:
+            self.strategy = strategy
+        if rng_state is not None:
+            self.rng.setstate(rng_state)
+            if self.game_is_over():
+                self.end_game()
+
+        return resolved
+
+    def notify_turn(self, shots):
+        for listener in self.listeners:
+            listener.on_turn(self, shots)
+
+    # COM TARGETING
+    def free_adjacents(self, cell):
+        board = self.board
+
+        # Defining all 4 adjacents of given coord
+        right_adjacent = board.neighbour(cell, 0, 1)
+        left_adjacent = board.neighbour(cell, 0, -1)
+        up_adjacent = board.neighbour(cell, -1, 0)
+        down_adjacent = board.neighbour(cell, 1, 0)
+
+        horizontal_hit = self.is_hit(right_adjacent) or self.is_hit(left_adjacent)
+        vertical_hit = self.is_hit(up_adjacent) or self.is_hit(down_adjacent)
+
+        # A boat that goes along one direction can not continue along the other one
+        adjacents_list = []
+        for adjacent in (right_adjacent, left_adjacent, up_adjacent, down_adjacent):
+            if adjacent is None or board.get_is_revealed(USER, adjacent):
+                continue
+            if horizontal_hit and adjacent in (up_adjacent, down_adjacent):
+                continue
+            if vertical_hit and adjacent in (right_adjacent, left_adjacent):
+                continue
+            adjacents_list.append(adjacent)
+
+        return adjacents_list
+
+    def calculate_adjacent(self, cell):
+        adjacents_list = self.free_adjacents(cell)
+
+        # Adjacent to return
+        if len(adjacents_list) > 0:
+            return self.rng.choice(adjacents_list)
+        else:
+            return None
+
+    def is_hit(self, cell):
+        return cell is not None and self.board.get_is_revealed(USER, cell) and self.board.get_has_boat(USER, cell)
+
+    def is_water_or_out(self, cell):
+        return cell is None or (self.board.get_is_revealed(USER, cell) and not self.board.get_has_boat(USER, cell))
+
+    # COM BOOKKEEPING (only the coords touched by the last shot are evaluated again)
+    def discard(self, mask):
+        board = self.board
+        new = mask & ~board.discarded & board.full
+        board.discarded |= new
+
+        for cell in iter_bits(new):
+            self.candidates.remove(cell)
+            self.open_hits.discard(cell)
+
+    def observe(self, cell, hit, sunk=0):
+        board = self.board
+        self.candidates.remove(cell)
+
+        if hit:
+            self.open_hits.add(cell)
+
+            # Pairs of hits: the coords at the sides of both of them can not hold a boat
+            self.discard_pairs(cell)
+            for d_row, d_column in ((0, 1), (0, -1), (-1, 0), (1, 0)):
+                adjacent = board.neighbour(cell, d_row, d_column)
+                if self.is_hit(adjacent):
+                    self.discard_pairs(adjacent)
+
+            # A sunk ship is known at once
+            if sunk:
+                self.discard_ship(sunk)
+
+        else:
+            self.discard(1 << cell)
+
+            for d_row, d_column in ((0, 1), (0, -1), (-1, 0), (1, 0)):
+                adjacent = board.neighbour(cell, d_row, d_column)
+                if adjacent is None:
+                    continue
+
+                # Coords surrounded by water (or by the edges of the board) can not hold a boat
+                if self.is_surrounded(adjacent):
+                    self.discard(1 << adjacent)
+
+            if self.is_surrounded(cell):
+                self.discard(1 << cell)
+
+    def is_surrounded(self, cell):
+        for d_row, d_column in ((0, 1), (0, -1), (-1, 0), (1, 0)):
+            if not self.is_water_or_out(self.board.neighbour(cell, d_row, d_column)):
+                return False
+        return True
+
+    def discard_pairs(self, cell):
+        board = self.board
+        right_adjacent = board.neighbour(cell, 0, 1)
+        left_adjacent = board.neighbour(cell, 0, -1)
+        up_adjacent = board.neighbour(cell, -1, 0)
+        down_adjacent = board.neighbour(cell, 1, 0)
+
+        if self.is_hit(right_adjacent) or self.is_hit(left_adjacent):
+            self.discard(board.shift(1 << cell, -1, 0) | board.shift(1 << cell, 1, 0))
+
+        if self.is_hit(up_adjacent) or self.is_hit(down_adjacent):
+            self.discard(board.shift(1 << cell, 0, -1) | board.shift(1 << cell, 0, 1))
+
+    def discard_ship(self, ship):
+        '''
+        Discards a sunk ship and the coords around it, and takes it out of the boats COM looks for
+        '''
+        self.discard(ship | self.board.neighbours(ship))
+
+        length = popcount(ship)
+        boat_key = '{}_boat'.format(length)
+        if self.boats.get(boat_key, 0) > 0:
+            self.boats[boat_key] -= 1
+
+        for listener in self.listeners:
+            listener.on_boat_discarded(self, list(iter_bits(ship)), length)
@@ -21,9 +21,42 @@ __email__ = 'jaime.rvq@gmail.com'
 __status__ = 'Testing'
 
 import nuke
+import os
+import sys
 import random
-import string
 import datetime
+import threading
+import traceback
+
+# Qt tells the size of the DAG panel to the level of detail, and watches its zoom and centre (Nuke 11 ships PySide2,
+# older versions PySide)
+try:
+    from PySide2 import QtCore, QtWidgets
+except ImportError:
+    try:
+        from PySide import QtCore, QtGui as QtWidgets
+    except ImportError:
+        QtCore = QtWidgets = None
+
+# The game engine lives next to this file. Pasted in the Script Editor, the script has no file: its folder must be
+# on NUKE_PATH then (see the README)
+if '__file__' in globals() and os.path.dirname(os.path.abspath(__file__)) not in sys.path:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import battleship_engine
+    import battleship_layouts
+    import battleship_strategies
+    import battleship_log
+    import battleship_replay
+    import battleship_bank
+    import battleship_profile
+    import battleship_state
+except ImportError as error:
+    nuke.message('<font size=3>The modules of the battleship game could not be found ({}).\n'
+                 'Add the folder of battleship_exec.py to NUKE_PATH, or run the script from its file'.format(error))
+    raise ImportError('The modules of the battleship game could not be found ({}). Add the folder of '
+                      'battleship_exec.py to NUKE_PATH, or run the script from its file'.format(error))
 
 
 # -------------------------------- SCENE PRESETS -------------------------------- #
@@ -45,37 +78,212 @@ user_com_distance = squareNumber * (90 + 300 * (1 / squareNumber))
 backColor = 255  # Color to change the DAG to (255=black)
 
 
+# -------------------------------- COM PROPERTIES -------------------------------- #
+
+# Strategy of COM when the game starts: 'heuristic', 'parity' or 'density' (density needs NumPy, COM uses the
+# heuristic without it). It can be changed from the Gameplay tab during the game
+comStrategy = 'heuristic'
+
+logLevel = 'info'  # 'off', 'info' (shots of COM) or 'debug' (also the coords and boats COM has discarded)
+
+# COM chooses its shots on a worker thread, so Nuke keeps responding, and they are drawn in batches
+comThreaded = True
+comDrawBatch = 25  # Shots of COM drawn by every call to the main thread
+
+# Nuke's queue of calls for the main thread (None outside Nuke's interface, COM then plays on the main thread)
+executeInMainThread = getattr(nuke, 'executeInMainThread', None)
+
+
+# -------------------------------- REPLAY PROPERTIES -------------------------------- #
+
+# Every game is recorded in this folder ('' to record nothing)
+replayFolder = os.path.join(os.path.expanduser('~'), '.nuke', 'bShip_replays')
+
+# Recorded game to watch instead of playing ('' to play). Its board must have squareNumber squares on the side
+replayFile = ''
+
+
+# -------------------------------- PROFILING PROPERTIES -------------------------------- #
+
+# Times the phases of the game and counts their calls to the Nuke API, shown in the Gameplay tab
+profiling = True
+profileWindow = 20  # Last calls of every phase that are averaged in the Gameplay tab
+
+# Folder where the whole profile is written as JSON at the end of every game ('' to write none)
+profileFolder = ''
+
+
+# -------------------------------- LEVEL OF DETAIL PROPERTIES -------------------------------- #
+
+# Big boards get one dot per coord, and only the coords framed in the DAG get their full mosaic of dots
+lodMode = 'auto'  # 'auto' (only for boards bigger than lodThreshold), 'on' or 'off'
+lodThreshold = 20  # Squares on the board side from which 'auto' turns the level of detail on
+lodRefineZoom = 0.5  # DAG zoom from which the framed coords get their full mosaic
+# Size in pixels of the DAG panel, to know how much of the board is framed. None reads it from the Node Graph
+# (falling back to 1920x1080 when Qt is not available); set it, e.g. (1280, 720), if the framed coords are off
+lodViewport = None
+lodMaxCells = 150  # Coords with their full mosaic at once, the closest to the centre of the DAG first
+lodPollInterval = 250  # Milliseconds between two looks at the DAG zoom and centre (0 to refine only after shots)
+
+
+def lod_enabled():
+    return lodMode == 'on' or (lodMode == 'auto' and squareNumber > lodThreshold)
+
+
+# -------------------------------- NODE REGISTRY -------------------------------- #
+
+class NodeRegistry(object):
+    '''
+    Every node created by the game, grouped by role (grid, labels, coords, effects, main), so the game
+    never has to look through the rest of the script
+    '''
+
+    ROLES = ('grid', 'labels', 'coords', 'effects', 'main')
+
+    def __init__(self):
+        self.roles = dict((role, {}) for role in self.ROLES)  # Role -> {node name: node}
+        self.positions = {}  # Node name -> (xpos, ypos) the node is locked at
+
+    @staticmethod
+    def role_of(node):
+        # Role of a board node, from its name and class (for the nodes pasted from the board template)
+        name = node.name()
+        if name.startswith('Fx_bShip_'):
+            return 'effects'
+        if name.startswith('Coord_bShip_') or name.startswith('Cell_bShip_'):
+            return 'coords'
+        if node.Class() == 'StickyNote':
+            return 'labels'
+        return 'grid'
+
+    def add(self, role, node):
+        self.roles[role][node.name()] = node
+        return node
+
+    def add_board(self, nodes):
+        for node in nodes:
+            self.add(self.role_of(node), node)
+
+    def get(self, role, name):
+        return self.roles[role].get(name)
+
+    def nodes(self, *roles):
+        nodes = []
+        for role in roles or self.ROLES:
+            nodes.extend(self.roles[role].values())
+        return nodes
+
+    def select(self, *roles):
+        for node in self.nodes(*roles):
+            node.setSelected(True)
+
+    def lock(self, *roles):
+        for node in self.nodes(*roles):
+            self.lock_node(node)
+
+    def lock_node(self, node):
+        self.positions[node.name()] = (node['xpos'].value(), node['ypos'].value())
+
+    def delete(self, role, node):
+        self.roles[role].pop(node.name(), None)
+        self.positions.pop(node.name(), None)
+        _nuke.delete(node)
+
+    def delete_all(self):
+        for role in self.ROLES:
+            for node in self.roles[role].values():
+                _nuke.delete(node)
+            self.roles[role].clear()
+        self.positions.clear()
+
+
+# Guard added by an earlier run of the script in this session
+if globals().get('guard_positions') is not None:
+    nuke.removeKnobChanged(guard_positions)
+
+
+def guard_positions():
+    # Single knobChanged callback for the whole script: the locked nodes are moved back to their position
+    knob = _nuke.thisKnob()
+    if knob.name() not in ('xpos', 'ypos'):
+        return
+
+    position = registry.positions.get(_nuke.thisNode().name())
+    if position is not None:
+        value = position[0] if knob.name() == 'xpos' else position[1]
+        if knob.value() != value:
+            knob.setValue(value)
+
+
+def clear_selection():
+    # Only the selected nodes are touched, however big the script is
+    for node in _nuke.selectedNodes():
+        node.setSelected(False)
+
+
 # -------------------------------- BOARD CREATION -------------------------------- #
 
-def board_creation():
-    # Changes to the scene
-    nuke.toNode('preferences')['DAGBackColor'].setValue(backColor)
+# The static board is built once per board size and cached as a .nk snippet, so later games just paste it
+templateCache = os.path.join(os.path.expanduser('~'), '.nuke', 'bShip_cache')
+templateVersion = 4  # To be increased whenever the nodes of the board change
 
-    # Progress bar
-    nodes_progress = nuke.ProgressTask('Battleship game')
-    nodes_progress.setMessage('Creating board')
-    nodes_progress.setProgress(20)
 
-    # CREATION OF BOARD
-    # Creation of squares
+def board_template_path():
+    # Every setting the static board depends on is in the name (the rest of its look only changes with the version)
+    return os.path.join(templateCache, 'bShip_board_v{}_{}squares_{}dots_{}px_bg{:08x}{}.nk'.format(
+        templateVersion, squareNumber, dotNumber, dotDistance, backColor, '_lod' if lod_enabled() else ''))
+
+
+def coord_main_position(i, j):
+    # (xpos, ypos) of the dot of a coord on the COM side
+    return (j * squareSize) + halfSquare, (i * squareSize) + halfSquare
+
+
+def user_main_position(i, j):
+    # Centre of a coord on the USER side (the mosaic has no main dot there)
+    xpos, ypos = coord_main_position(i, j)
+    return xpos, ypos + user_com_distance
+
+
+def mosaic_offsets():
+    # Offsets from the centre of a coord of the dots of its mosaic, row by row (the centre is left out)
+    steps = range(dotDistance - halfSquare, halfSquare, dotDistance)
+    return tuple((x_offset, y_offset) for y_offset in steps for x_offset in steps if x_offset or y_offset)
+
+
+# Computed once, the mosaics of every coord are these offsets from its centre
+mosaicOffsets = mosaic_offsets()
+
+
+def mosaic_positions(i, j, id):
+    # Positions of the dots that show the nature of a coord, on the COM or on the USER side
+    xpos, ypos = coord_main_position(i, j) if id == COM else user_main_position(i, j)
+    return [(xpos + x_offset, ypos + y_offset) for x_offset, y_offset in mosaicOffsets]
+
+
+def board_nodes_creation(nodes_progress):
+    board_nodes = []
+    lod = lod_enabled()
+
+    # Creation of squares (just their corners with the level of detail)
     for i in range(0, totalSize, dotDistance):
 
         for j in range(0, totalSize, dotDistance):
 
-            if j % squareSize == 0 or i % squareSize == 0:
-                nuke.nodes.Dot(name='Dot_COM_bShip',
-                               xpos=j,
-                               ypos=i,
-                               hide_input=True,
-                               tile_color=1720943359)
+            if (j % squareSize == 0 and i % squareSize == 0) if lod else (j % squareSize == 0 or i % squareSize == 0):
+                board_nodes.append(_nuke.nodes.Dot(name='Dot_COM_bShip',
+                                                  xpos=j,
+                                                  ypos=i,
+                                                  hide_input=True,
+                                                  tile_color=1720943359))
 
-                nuke.nodes.Dot(name='Dot_USER_bShip',
-                               xpos=j,
-                               ypos=i + user_com_distance,
-                               hide_input=True,
-                               tile_color=1720943359)
+                board_nodes.append(_nuke.nodes.Dot(name='Dot_USER_bShip',
+                                                  xpos=j,
+                                                  ypos=i + user_com_distance,
+                                                  hide_input=True,
+                                                  tile_color=1720943359))
 
-    nodes_progress.setProgress(60)
+    nodes_progress.setProgress(40)
 
     # Creation of divider and COM/USER tags
     if squareNumber > 7:
@@ -83,81 +291,164 @@ def board_creation():
         separation = totalSize + ((user_com_distance - totalSize) / 2)
 
         for X in range(-1, squareNumber + 4):
-            no_op = nuke.nodes.NoOp(xpos=(X * 80) - 120,
-                                    ypos=separation - 30,
-                                    hide_input=True)
-
-            no_op['name'].setValue('')
+            # Named after the game, so a resumed game finds them again
+            board_nodes.append(_nuke.nodes.NoOp(name='Divider_bShip',
+                                               xpos=(X * 80) - 120,
+                                               ypos=separation - 30,
+                                               hide_input=True))
 
             if X == -1:
-                nuke.nodes.StickyNote(name='COMtagbShip',
-                                      label='COM',
-                                      note_font='Arial Bold',
-                                      note_font_size=25,
-                                      note_font_color=4278190335,
-                                      tile_color=backColor,
-                                      xpos=(X * 80) - 120,
-                                      ypos=separation - 100)
-
-                nuke.nodes.StickyNote(name='USERtagbShip',
-                                      label='USER',
-                                      note_font='Arial Bold',
-                                      note_font_size=25,
-                                      note_font_color=536805631,
-                                      tile_color=backColor,
-                                      xpos=(X * 80) - 120,
-                                      ypos=separation + 25)
+                board_nodes.append(_nuke.nodes.StickyNote(name='COMtagbShip',
+                                                         label='COM',
+                                                         note_font='Arial Bold',
+                                                         note_font_size=25,
+                                                         note_font_color=4278190335,
+                                                         tile_color=backColor,
+                                                         xpos=(X * 80) - 120,
+                                                         ypos=separation - 100))
+
+                board_nodes.append(_nuke.nodes.StickyNote(name='USERtagbShip',
+                                                         label='USER',
+                                                         note_font='Arial Bold',
+                                                         note_font_size=25,
+                                                         note_font_color=536805631,
+                                                         tile_color=backColor,
+                                                         xpos=(X * 80) - 120,
+                                                         ypos=separation + 25))
 
-    nodes_progress.setProgress(80)
+    nodes_progress.setProgress(60)
 
     # Creation of coord labels
     label_size = 29
     for N in range(0, squareNumber):
-        nuke.nodes.StickyNote(xpos=N * squareSize + 5,
-                              ypos=-50,
-                              note_font='Arial Black Bold Bold Bold Bold',
-                              note_font_size=label_size,
-                              tile_color=backColor,
-                              label=str(N + 1),
-                              name='bShip' + str(N + 1))
-
-        nuke.nodes.StickyNote(xpos=N * squareSize + 5,
-                              ypos=-50 + user_com_distance,
-                              note_font='Arial Black Bold Bold Bold Bold',
-                              note_font_size=label_size,
-                              tile_color=backColor,
-                              label=str(N + 1),
-                              name='bShip' + str(N + 1))
-
-        nuke.nodes.StickyNote(xpos=-80,
-                              ypos=N * squareSize + 28,
-                              note_font='Arial Black Bold Bold Bold Bold',
-                              note_font_size=label_size,
-                              tile_color=backColor,
-                              label=string.uppercase[N],
-                              name='bShip' + string.uppercase[N])
-
-        nuke.nodes.StickyNote(xpos=-80,
-                              ypos=N * squareSize + 28 + user_com_distance,
-                              note_font='Arial Black Bold Bold Bold Bold',
-                              note_font_size=label_size,
-                              tile_color=backColor,
-                              label=string.uppercase[N],
-                              name='bShip' + string.uppercase[N])
+        board_nodes.append(_nuke.nodes.StickyNote(xpos=N * squareSize + 5,
+                                                 ypos=-50,
+                                                 note_font='Arial Black Bold Bold Bold Bold',
+                                                 note_font_size=label_size,
+                                                 tile_color=backColor,
+                                                 label=str(N + 1),
+                                                 name='bShip' + str(N + 1)))
+
+        board_nodes.append(_nuke.nodes.StickyNote(xpos=N * squareSize + 5,
+                                                 ypos=-50 + user_com_distance,
+                                                 note_font='Arial Black Bold Bold Bold Bold',
+                                                 note_font_size=label_size,
+                                                 tile_color=backColor,
+                                                 label=str(N + 1),
+                                                 name='bShip' + str(N + 1)))
+
+        board_nodes.append(_nuke.nodes.StickyNote(xpos=-80,
+                                                 ypos=N * squareSize + 28,
+                                                 note_font='Arial Black Bold Bold Bold Bold',
+                                                 note_font_size=label_size,
+                                                 tile_color=backColor,
+                                                 label=battleship_engine.row_label(N),
+                                                 name='bShip' + battleship_engine.row_label(N)))
+
+        board_nodes.append(_nuke.nodes.StickyNote(xpos=-80,
+                                                 ypos=N * squareSize + 28 + user_com_distance,
+                                                 note_font='Arial Black Bold Bold Bold Bold',
+                                                 note_font_size=label_size,
+                                                 tile_color=backColor,
+                                                 label=battleship_engine.row_label(N),
+                                                 name='bShip' + battleship_engine.row_label(N)))
+
+    nodes_progress.setProgress(80)
+
+    # Creation of coord dots (the ones the user selects to fire)
+    for i in range(0, squareNumber):
+        for j in range(0, squareNumber):
+            xpos, ypos = coord_main_position(i, j)
+            board_nodes.append(_nuke.nodes.Dot(name='Coord_bShip_' + battleship_engine.cell_name(i, j),
+                                              xpos=xpos,
+                                              ypos=ypos,
+                                              tile_color=4292085759,
+                                              hide_input=True))
+
+    nodes_progress.setProgress(90)
+
+    # With the level of detail, one dot per coord on the USER side, and the mosaics are created when framed
+    if lod:
+        for i in range(0, squareNumber):
+            for j in range(0, squareNumber):
+                xpos, ypos = user_main_position(i, j)
+                board_nodes.append(_nuke.nodes.Dot(name='Cell_bShip_USER_' + battleship_engine.cell_name(i, j),
+                                                  xpos=xpos,
+                                                  ypos=ypos,
+                                                  tile_color=backColor,
+                                                  hide_input=True))
+        return board_nodes
+
+    # Pool of effect dots: they start with the color of the DAG and only get recolored when a shot lands
+    for i in range(0, squareNumber):
+        for j in range(0, squareNumber):
+            name = battleship_engine.cell_name(i, j)
+
+            # The centre of the USER side is a dot of its mosaic too
+            for side_tag, positions in (('COM', mosaic_positions(i, j, COM)),
+                                        ('USER', mosaic_positions(i, j, USER) + [user_main_position(i, j)])):
+                for N, (xpos, ypos) in enumerate(positions):
+                    board_nodes.append(_nuke.nodes.Dot(name='Fx_bShip_{}_{}_{}'.format(side_tag, name, N),
+                                                      xpos=xpos,
+                                                      ypos=ypos,
+                                                      tile_color=backColor,
+                                                      hide_input=True))
+
+    return board_nodes
+
+
+def save_board_template(board_nodes, template):
+    if not os.path.isdir(templateCache):
+        os.makedirs(templateCache)
+
+    clear_selection()
+    for node in board_nodes:
+        node.setSelected(True)
+
+    # Written aside first, so an interrupted copy never leaves a broken template behind
+    _nuke.nodeCopy(template + '.tmp')
+    os.rename(template + '.tmp', template)
+
+
+def board_creation():
+    # Changes to the scene
+    _nuke.toNode('preferences')['DAGBackColor'].setValue(backColor)
+
+    # Progress bar
+    nodes_progress = _nuke.ProgressTask('Battleship game')
+    nodes_progress.setProgress(20)
+
+    # CREATION OF BOARD
+    template = board_template_path()
+    if os.path.isfile(template):
+        nodes_progress.setMessage('Loading board')
+        clear_selection()
+        _nuke.nodePaste(template)
+
+        # The pasted nodes come selected
+        registry.add_board(_nuke.selectedNodes())
+
+    else:
+        nodes_progress.setMessage('Creating board')
+        board_nodes = board_nodes_creation(nodes_progress)
+        registry.add_board(board_nodes)
+        try:
+            save_board_template(board_nodes, template)
+        except (IOError, OSError, RuntimeError):
+            log.info('\nThe board could not be cached at {}', template)
 
     nodes_progress.setProgress(100)
     del nodes_progress
 
-    # Framing the nodes
-    for node in nuke.allNodes():
-        node.setSelected(True)
-    nuke.zoomToFitSelected()
-    for node in nuke.allNodes():
-        node.setSelected(False)
+    # Framing the board (its labels and the main node are on its edges)
+    clear_selection()
+    registry.select('labels', 'main')
+    _nuke.zoomToFitSelected()
+    clear_selection()
 
     # Changes to the Main node
     kMainButton.setLabel('<b><font size = 6>FIRE!')
-    kMainButton.setValue('user_fires()')
+    kMainButton.setValue(resume_command(if_undefined=True) + 'user_fires()')
     kInfo.setValue('''How to to fire:
 -Select a coordinate (yellow dot node)
 -Press the FIRE! button''')
@@ -166,55 +457,52 @@ def board_creation():
 # -------------------------------- COORDINATE CLASS -------------------------------- #
 
 # IDs that will be used when calling most methods in this class:
-USER = 1
-COM = 0
+USER = battleship_engine.USER
+COM = battleship_engine.COM
 
 
 class Coordinate(object):
+    '''
+    Nuke view of one coord of the board: it holds the nodes and reads its state from the game engine.
+    There is one per coord of the board, so they only keep references: positions are worked out from the row
+    and the column, and the palettes are shared
+    '''
 
-    def __init__(self, com_main_coord, i, j):
+    __slots__ = ('row', 'column', 'name', 'game', 'board', 'cell', 'main_dot', 'com_dots', 'user_dots',
+                 'user_main_dots', 'palettes', 'has_boat_showed')
+
+    # Node-related properties
+    DESTRUCTION_COLORS = (1444619007, 1142163967, 2385447935, 2471692543, 2182227711, 3239706624, 3931066112)
+    BOAT_COLORS = (2576980479, 2863311615, 2863311615, 3149642751, 2576985599, 1431660799, 2004322815)
+    WATER_COLORS = (456017151, 591157504, 675374592)
+
+    def __init__(self, i, j, game, effect_dots):
 
         # GENERAL PROPERTIES
         self.row = i
         self.column = j
-        self.name = chr(i + 65) + str(j + 1)
+        self.name = battleship_engine.cell_name(i, j)
+
+        self.game = game
+        self.board = game.board
+        self.cell = game.board.index(i, j)
 
         # COM COORD PROPERTIES
-        self.com_main_coord = com_main_coord
-        self.main_dot = nuke.nodes.Dot(name='Coord_bShip_' + self.name,
-                                       xpos=self.com_main_coord['xpos'],
-                                       ypos=self.com_main_coord['ypos'],
-                                       tile_color=4292085759,
-                                       hide_input=True)
-        self.com_coords = []
-        for i in range((self.com_main_coord['ypos'] - halfSquare + dotDistance),
-                       (self.com_main_coord['ypos'] + halfSquare),
-                       dotDistance):
-            for j in range((self.com_main_coord['xpos'] - halfSquare + dotDistance),
-                           (self.com_main_coord['xpos'] + halfSquare), dotDistance):
-                if not (i == self.com_main_coord['xpos'] and j == self.com_main_coord['xpos']):
-                    self.com_coords.append({'ypos': i, 'xpos': j})
-
-        self.com_has_boat = False
-        self.com_is_revealed = False
+        self.main_dot = registry.get('coords', 'Coord_bShip_' + self.name)  # Comes with the board
 
-        # USER COORD PROPERTIES
-        self.user_coords = []
-        for coord in self.com_coords:
-            self.user_coords.append({'xpos': coord['xpos'], 'ypos': coord['ypos'] + user_com_distance})
-        self.user_coords.append({'xpos': self.com_main_coord['xpos'],
-                                 'ypos': self.com_main_coord['ypos'] + user_com_distance})
+        # Pooled effect dots (they come with the board too, or are created when framed with the level of detail)
+        self.com_dots = effect_dots.get(('COM', self.name), [])
+        self.user_dots = effect_dots.get(('USER', self.name), [])
 
-        self.user_has_boat = False
-        self.has_boat_showed = False
-        self.user_boat_dots = []
-        self.user_is_revealed = False
-        self.user_is_discarded = False
+        # Single dot of the USER side, with the level of detail
+        user_main_dot = registry.get('coords', 'Cell_bShip_USER_' + self.name)
+        self.user_main_dots = [user_main_dot] if user_main_dot is not None else []
+
+        # Colors shown on every side, so a mosaic created later looks like the rest of the coord
+        self.palettes = [None, None]
 
-        # Node-related properties
-        self.destruction_colors = [1444619007, 1142163967, 2385447935, 2471692543, 2182227711, 3239706624, 3931066112]
-        self.boat_colors = [2576980479, 2863311615, 2863311615, 3149642751, 2576985599, 1431660799, 2004322815]
-        self.water_colors = [456017151, 591157504, 675374592]
+        # USER COORD PROPERTIES
+        self.has_boat_showed = False
 
     def __str__(self):
         return 'Coordinate object {name} | ' \
@@ -225,11 +513,11 @@ class Coordinate(object):
                ''.format(name=self.name,
                          row=self.row,
                          column=self.column,
-                         comboat=self.com_has_boat,
-                         comrevealed=self.com_is_revealed,
-                         userboat=self.user_has_boat,
-                         userrevealed=self.user_is_revealed,
-                         userisdiscarded=self.user_is_discarded)
+                         comboat=self.get_has_boat(COM),
+                         comrevealed=self.get_is_revealed(COM),
+                         userboat=self.get_has_boat(USER),
+                         userrevealed=self.get_is_revealed(USER),
+                         userisdiscarded=self.get_is_discarded(USER))
 
     # GENERAL METHODS
     def get_name(self):
@@ -243,126 +531,148 @@ class Coordinate(object):
 
     # GAMEPLAY METHODS
     def get_has_boat(self, id):
-        if id == 0:
-            return self.com_has_boat
-        elif id == 1:
-            return self.user_has_boat
+        return self.board.get_has_boat(id, self.cell)
 
     def set_has_boat(self, id):
-        if id == 0:
-            self.com_has_boat = True
-        elif id == 1:
-            self.user_has_boat = True
+        self.board.set_has_boat(id, self.cell)
 
     def get_is_revealed(self, id):
-        if id == 0:
-            return self.com_is_revealed
-        elif id == 1:
-            return self.user_is_revealed
+        return self.board.get_is_revealed(id, self.cell)
 
     def set_is_revealed(self, id):
-        if id == 0:
-            self.com_is_revealed = True
-        elif id == 1:
-            self.user_is_revealed = True
+        self.board.set_is_revealed(id, self.cell)
 
     def take_fire(self, id):
-        if id == 0:
-            if self.com_has_boat:
-                for element in self.com_coords:
-                    nuke.nodes.Dot(name='Destroyed_bShip',
-                                   xpos=element['xpos'],
-                                   ypos=element['ypos'],
-                                   tile_color=random.choice(self.destruction_colors),
-                                   hide_input=True)
-                self.main_dot['tile_color'].setValue(random.choice(self.destruction_colors))
-            else:
-                for element in self.com_coords:
-                    nuke.nodes.Dot(name='Water_bShip',
-                                   xpos=element['xpos'],
-                                   ypos=element['ypos'],
-                                   tile_color=random.choice(self.water_colors),
-                                   hide_input=True)
-                self.main_dot['tile_color'].setValue(random.choice(self.water_colors))
+        # The engine resolves the shot, and the renderer calls draw_fire() back
+        return self.game.fire(id, self.cell)
 
-            self.set_is_revealed(COM)
-            return self.com_has_boat
+    def draw_fire(self, id, hit):
+        if hit:
+            self.paint(id, self.DESTRUCTION_COLORS)
+        else:
+            self.paint(id, self.WATER_COLORS)
 
+    def paint(self, id, colors):
+        self.palettes[id] = colors
+        if id == 0:
+            recolor(self.com_dots + [self.main_dot], colors)
         elif id == 1:
-            if self.user_has_boat:
-                for node in self.user_boat_dots:
-                    node['tile_color'].setValue(random.choice(self.destruction_colors))
-            else:
-                for element in self.user_coords:
-                    nuke.nodes.Dot(name='Water_bShip',
-                                   xpos=element['xpos'],
-                                   ypos=element['ypos'],
-                                   tile_color=random.choice(self.water_colors),
-                                   hide_input=True)
-
-            self.set_is_revealed(USER)
-            return self.user_has_boat
+            recolor(self.user_dots + self.user_main_dots, colors)
+
+    # LEVEL OF DETAIL METHODS
+    def refine(self, id):
+        # Creates the full mosaic of one side, painted like the rest of the coord
+        side_tag, dots = ('COM', self.com_dots) if id == 0 else ('USER', self.user_dots)
+
+        for N, (xpos, ypos) in enumerate(mosaic_positions(self.row, self.column, id)):
+            dot = _nuke.nodes.Dot(name='Fx_bShip_{}_{}_{}'.format(side_tag, self.name, N),
+                                 xpos=xpos,
+                                 ypos=ypos,
+                                 tile_color=backColor,
+                                 hide_input=True)
+            dots.append(registry.add('effects', dot))
+            registry.lock_node(dot)
+
+        if self.palettes[id] is not None:
+            recolor(dots, self.palettes[id])
+
+    def coarsen(self, id):
+        dots = self.com_dots if id == 0 else self.user_dots
+        for node in dots:
+            registry.delete('effects', node)
+        del dots[:]
 
     # COM EXCLUSIVE METHODS
     def get_x_coord(self, id):
         if id == 0:
-            return self.com_main_coord['xpos']
+            return coord_main_position(self.row, self.column)[0]
 
     def get_y_coord(self, id):
         if id == 0:
-            return self.com_main_coord['ypos']
+            return coord_main_position(self.row, self.column)[1]
 
     def show_nature(self, id):
         if id == 0:
-            if self.com_has_boat:
-                for element in self.com_coords:
-                    nuke.nodes.Dot(name='Boat_bShip',
-                                   xpos=element['xpos'],
-                                   ypos=element['ypos'],
-                                   tile_color=random.choice(self.boat_colors),
-                                   hide_input=True)
-                self.main_dot['tile_color'].setValue(random.choice(self.boat_colors))
+            if self.get_has_boat(COM):
+                self.paint(COM, self.BOAT_COLORS)
             else:
-                for element in self.com_coords:
-                    nuke.nodes.Dot(name='Water_bShip',
-                                   xpos=element['xpos'],
-                                   ypos=element['ypos'],
-                                   tile_color=random.choice(self.water_colors),
-                                   hide_input=True)
-                self.main_dot['tile_color'].setValue(random.choice(self.water_colors))
+                self.paint(COM, self.WATER_COLORS)
 
             self.set_is_revealed(COM)
-            return self.com_has_boat
+            return self.get_has_boat(COM)
 
     # PLAYER EXCLUSIVE METHODS
     def get_is_discarded(self, id):
         if id == 1:
-            return self.user_is_discarded
+            return self.board.get_is_discarded(self.cell)
 
     def set_is_discarded(self, id):
         if id == 1:
-            self.user_is_discarded = True
+            self.game.discard(1 << self.cell)
 
     def show_boat(self, id):
         if id == 1:
-            if self.user_has_boat:
-                for element in self.user_coords:
-                    boat_node = nuke.nodes.Dot(name='Boat_bShip',
-                                               xpos=element['xpos'],
-                                               ypos=element['ypos'],
-                                               tile_color=random.choice(self.boat_colors),
-                                               hide_input=True)
-                    self.user_boat_dots.append(boat_node)
+            if self.get_has_boat(USER):
+                self.paint(USER, self.BOAT_COLORS)
             self.has_boat_showed = True
 
-    def get_has_boat_showed(self):
+    def get_has_boat_showed(self, id):
         if id == 1:
             return self.has_boat_showed
 
+    # UNDONE TURNS
+    def cover(self, id):
+        # Back to how the coord looked before it was fired at
+        self.palettes[id] = None
+        if id == 0:
+            recolor(self.com_dots, [backColor])
+            recolor([self.main_dot], [4292085759])
+        elif id == 1:
+            self.has_boat_showed = showUserAllBoats
+            if self.has_boat_showed and self.get_has_boat(USER):
+                self.paint(USER, self.BOAT_COLORS)
+            else:
+                recolor(self.user_dots + self.user_main_dots, [backColor])
+
+    # RESUMED GAMES
+    def restore_display(self):
+        # What the dots of a resumed game show, so the mosaics created later look the same
+        self.has_boat_showed = showUserAllBoats or self.get_is_revealed(USER)
+
+        for id in (COM, USER):
+            if self.get_is_revealed(id):
+                self.palettes[id] = self.DESTRUCTION_COLORS if self.get_has_boat(id) else self.WATER_COLORS
+
+        if self.palettes[USER] is None and self.has_boat_showed and self.get_has_boat(USER):
+            self.palettes[USER] = self.BOAT_COLORS
+
+
+def recolor(nodes, colors):
+    profiler.count('knob.setValue', len(nodes))
+    for node in nodes:
+        node['tile_color'].setValue(random.choice(colors))
+
 
 # -------------------------------- COORDINATE OBJECTS-------------------------------- #
 
+def effect_dots_index():
+    # Pooled effect dots grouped by side and coord, found in a single pass ('Fx_bShip_COM_A1_0' and so on)
+    effect_dots = {}
+    for node in registry.nodes('effects'):
+        side_tag, coord_name = node.name().split('_')[2:4]
+        effect_dots.setdefault((side_tag, coord_name), []).append(node)
+
+    return effect_dots
+
+
+# Coordinate objects by the name of their coord dot, so the target of the user is found in a single lookup
+coord_index = {}
+
+
 def coord_objects_creation():
+    effect_dots = effect_dots_index()
+    coord_index.clear()
+
     # Matrix of coordinate objects
     objects_matrix = [0] * squareNumber
     for s in range(squareNumber):
@@ -371,77 +681,162 @@ def coord_objects_creation():
     for i in range(0, squareNumber):
 
         for j in range(0, squareNumber):
-            objects_matrix[i][j] = Coordinate(
-                {'xpos': (j * squareSize) + halfSquare, 'ypos': (i * squareSize) + halfSquare}, i, j)
+            objects_matrix[i][j] = Coordinate(i, j, game, effect_dots)
+            coord_index[objects_matrix[i][j].main_dot.name()] = objects_matrix[i][j]
 
     return objects_matrix
 
 
+# -------------------------------- LEVEL OF DETAIL -------------------------------- #
+
+# (side, row, column) of the coords that have their full mosaic now
+refined_coords = set()
+
+
+def dag_viewport():
+    '''
+    Size in pixels of the DAG panel: lodViewport when it is set, else the size of the main Node Graph
+    '''
+    if lodViewport:
+        return lodViewport
+
+    if QtWidgets is not None:
+        for widget in QtWidgets.QApplication.allWidgets():
+            if widget.objectName() == 'DAG.1':
+                return widget.width(), widget.height()
+
+    return 1920, 1080
+
+
+def framed_coords():
+    '''
+    (side, row, column) of the coords framed by the DAG, the closest to its centre first.
+    None of them when the DAG is zoomed out
+    '''
+    zoom = _nuke.zoom()
+    if zoom < lodRefineZoom:
+        return []
+
+    center_x, center_y = _nuke.center()
+    width, height = dag_viewport()
+    half_width = width / (2.0 * zoom)
+    half_height = height / (2.0 * zoom)
+
+    first_column = max(0, int((center_x - half_width) // squareSize))
+    last_column = min(squareNumber - 1, int((center_x + half_width) // squareSize))
+
+    framed = []
+    for side, offset in ((COM, 0), (USER, user_com_distance)):
+        first_row = max(0, int((center_y - half_height - offset) // squareSize))
+        last_row = min(squareNumber - 1, int((center_y + half_height - offset) // squareSize))
+
+        for i in range(first_row, last_row + 1):
+            for j in range(first_column, last_column + 1):
+                distance = abs(i * squareSize + halfSquare + offset - center_y) + \
+                           abs(j * squareSize + halfSquare - center_x)
+                framed.append((distance, side, i, j))
+
+    framed.sort()
+    return [(side, i, j) for distance, side, i, j in framed[:lodMaxCells]]
+
+
+def update_view():
+    # Mosaics for the coords that are framed now, single dots for the ones that are not framed anymore
+    global refined_view
+    if not lod_enabled():
+        return
+
+    framed = set(framed_coords())
+    for side, i, j in refined_coords - framed:
+        coord_objects[i][j].coarsen(side)
+    for side, i, j in framed - refined_coords:
+        coord_objects[i][j].refine(side)
+
+    refined_coords.clear()
+    refined_coords.update(framed)
+    refined_view = dag_view()
+
+
+def dag_view():
+    return _nuke.zoom(), tuple(_nuke.center())
+
+
+# Zoom and centre of the DAG when the framed coords were last refined, and at the last look
+refined_view = None
+polled_view = None
+
+# Timer left by an earlier run of the script in this session
+if globals().get('viewTimer') is not None:
+    viewTimer.stop()
+viewTimer = None
+
+
+def poll_view():
+    # Main thread, every lodPollInterval: the framed coords are refined once the DAG has stopped moving
+    global polled_view
+    view = dag_view()
+    if view == polled_view and view != refined_view and not turn_in_flight:
+        update_view()
+    polled_view = view
+
+
+def view_polling():
+    return (lod_enabled() and lodPollInterval > 0 and QtCore is not None and
+            QtWidgets.QApplication.instance() is not None)
+
+
+def start_view_polling():
+    global viewTimer
+    if not view_polling():
+        return
+
+    viewTimer = QtCore.QTimer()
+    viewTimer.timeout.connect(poll_view)
+    viewTimer.start(lodPollInterval)
+
+
+def stop_view_polling():
+    global viewTimer
+    if viewTimer is not None:
+        viewTimer.stop()
+        viewTimer = None
+
+
 # -------------------------------- VALID LAYOUTS -------------------------------- #
 
-# Dictionary of boats in this configuration (10x10)
-boatDict = {'5_boat': 1, '4_boat': 1, '3_boat': 2, '2_boat': 1}
+# Dictionary of boats in this configuration (the 10x10 fleet, scaled to the size of the board)
+boatDict = battleship_layouts.scaled_fleet(battleship_engine.boatDict, squareNumber)
+
+# Layout bank written by battleship_bank.py for this board ('' to generate the layouts). The engine picks the layouts
+# of both sides from it, if it has the same board size and fleet
+layoutBank = ''
+
+
+def open_layout_bank():
+    if not layoutBank:
+        return None
+
+    try:
+        bank = battleship_bank.open_bank(layoutBank)
+    except (IOError, OSError, battleship_bank.BankError) as error:
+        log.info('\nLayout bank not used: {}\n-------------------', error)
+        return None
+
+    if not bank.matches(squareNumber, boatDict):
+        log.info('\nLayout bank not used: it is not of this board and fleet\n-------------------')
+        return None
+    return bank
 
 
 # Method to set the board
 def set_board():
-    # List of valid layouts
-    layout_list = [
-        [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [0, 1, 0, 0, 0, 0, 0, 0, 1, 0],
-         [0, 1, 0, 0, 0, 0, 0, 0, 1, 0], [0, 1, 0, 0, 0, 0, 0, 0, 1, 0],
-         [0, 1, 0, 1, 1, 1, 1, 0, 0, 0], [0, 1, 0, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-         [0, 0, 0, 1, 1, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
-        
-        [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [0, 0, 1, 1, 1, 1, 1, 0, 0, 0],
-         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
-         [0, 1, 1, 1, 1, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0, 1, 0, 0],
-         [0, 1, 1, 0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
-        
-        [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [0, 0, 1, 1, 1, 0, 0, 0, 1, 0],
-         [0, 0, 0, 0, 0, 0, 0, 0, 1, 0], [0, 1, 1, 1, 0, 0, 1, 0, 1, 0],
-         [0, 0, 0, 0, 0, 0, 1, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1, 0, 0, 0],
-         [0, 0, 1, 0, 0, 0, 0, 0, 0, 0], [0, 0, 1, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
-        
-        [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [1, 1, 1, 0, 0, 0, 0, 0, 1, 0],
-         [0, 0, 0, 0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 1, 1, 1, 0, 1, 0],
-         [0, 0, 0, 0, 0, 0, 0, 0, 1, 0], [0, 1, 0, 0, 0, 1, 0, 0, 1, 0], [0, 1, 0, 0, 0, 1, 0, 0, 0, 0],
-         [0, 0, 0, 0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
-        
-        [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [1, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-         [1, 0, 0, 0, 1, 0, 0, 1, 0, 0], [1, 0, 0, 0, 1, 0, 0, 1, 0, 0],
-         [1, 0, 0, 0, 1, 0, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0, 0, 1, 0], [0, 0, 0, 0, 1, 0, 0, 0, 1, 0],
-         [0, 0, 0, 0, 0, 0, 0, 0, 1, 0], [0, 0, 1, 1, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
-        
-        [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [1, 0, 0, 0, 0, 0, 0, 1, 0, 0],
-         [1, 0, 0, 0, 1, 0, 0, 1, 0, 0], [1, 0, 0, 0, 1, 0, 0, 1, 0, 0],
-         [1, 0, 0, 0, 1, 0, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0, 0, 0, 0],
-         [0, 0, 0, 0, 0, 0, 1, 0, 0, 0], [0, 0, 1, 1, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1, 0, 0, 0]],
-        
-        [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-         [0, 0, 0, 0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-         [0, 0, 0, 0, 1, 1, 1, 0, 1, 0], [0, 0, 0, 0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 1, 1, 1, 0, 0, 0],
-         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 1, 0, 1, 1, 1, 1, 0], [0, 0, 0, 1, 0, 0, 0, 0, 0, 0]],
-        
-        [[0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [0, 1, 0, 0, 0, 0, 0, 0, 1, 0],
-         [0, 1, 0, 0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 0, 0, 1, 0],
-         [0, 0, 0, 0, 1, 1, 1, 0, 1, 0], [0, 0, 0, 0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 1, 1, 1, 0, 0, 0],
-         [0, 0, 0, 0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 1, 1, 1, 1, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0]]
-    ]
-
-    while True:
-        user_layout = random.choice(layout_list)
-        com_layout = random.choice(layout_list)
-
-        if user_layout != com_layout:
-            break
-
-    for i in range(squareNumber):
-        for j in range(squareNumber):
-
-            if bool(user_layout[i][j]):
-                coord_objects[i][j].set_has_boat(USER)
-            if bool(com_layout[i][j]):
-                coord_objects[i][j].set_has_boat(COM)
+    if replay is not None:
+        # The layouts of the recorded game
+        game.set_layout_masks(replay.log.user_layout, replay.log.com_layout)
+    else:
+        # The engine picks two different layouts, from the layout bank if there is one
+        game.set_board()
+        recorder.start(game)
 
     # Option to display user's boats
     if showUserAllBoats:
@@ -451,510 +846,463 @@ def set_board():
                 element.show_boat(USER)
 
 
-# -------------------------------- GAMEPLAY FUNCTIONS -------------------------------- #
+# -------------------------------- RENDERER -------------------------------- #
 
-def user_fires():
+class NukeRenderer(battleship_engine.GameListener):
+    '''
+    Draws the results of the game engine on the DAG and keeps the Gameplay tab updated
+    '''
 
-    # Check if the fire input is correct
-    if len(nuke.selectedNodes()) > 1:
+    def on_shot(self, game, shot):
+        target = coord_objects[shot.row][shot.column]
 
-        nuke.message('<font size=3>Please select only one node')
-        for node in nuke.allNodes():
-            node.setSelected(False)
+        # USER has fired at COM
+        if shot.side == COM:
+            target.draw_fire(COM, shot.hit)
 
-    elif len(nuke.selectedNodes()) == 0:
-        nuke.message('<font size=3>Please select one of the yellow dots')
+            if not shot.hit:
+                kInfo.setValue('''How to to fire:
+-Select a coordinate (yellow dot node)
+-Press the FIRE! button''')
 
-    else:
-        # Check if it is a hit
-        target = None
-        for row in coord_objects:
-            for element in row:
-                if [element.get_x_coord(COM), element.get_y_coord(COM)] == [nuke.selectedNode()['xpos'].value(),
-                                                                            nuke.selectedNode()['ypos'].value()]:
-                    target = element
+                clear_selection()
 
-        if target.take_fire(COM):
-            if not game_is_over():
+            elif not game.game_is_over():
                 kInfo.setValue('''You have hit COM successfully, now you can fire again:
     -Select a coordinate (yellow dot node)
     -Press the FIRE! button''')
-                nStickyMain['label'].setValue("It's a hit!\nNow you can shoot again")
-
-                for node in nuke.allNodes():
-                    node.setSelected(False)
-            else:
-                reveal_com_boats()
-                end_game()
-
-        else:
-            kInfo.setValue('''How to to fire:
--Select a coordinate (yellow dot node)
--Press the FIRE! button''')
-
-            for node in nuke.allNodes():
-                node.setSelected(False)
-
-            com_fires()
-
+                if shot.sunk:
+                    length = battleship_engine.popcount(shot.sunk)
+                    log.info('\nUSER has sunk a boat of length {} of COM\n-------------------', length)
+                    nStickyMain['label'].setValue('You have sunk a boat of length {}!\n'
+                                                  'Now you can shoot again'.format(length))
+                else:
+                    nStickyMain['label'].setValue("It's a hit!\nNow you can shoot again")
 
-def com_fires(previous_coord=None, keep_tag=False):
-    if not game_is_over():
+                clear_selection()
 
-        discard_coords()
-        discard_water()
+            return
 
-        if previous_coord is None:
+        # A single shot at USER, outside of a turn of COM
+        self.on_turn(game, [shot])
 
-            # Take all objects that have not been revealed
-            candidate_coords = []
+    def on_turn(self, game, shots):
+        '''
+        Draws the whole turn of COM in one pass, and writes the feedback and the main label once
+        '''
+        if not shots:
+            return
 
-            for row in coord_objects:
-                for element in row:
-                    if (not element.get_is_revealed(USER)) and (not element.get_is_discarded(USER)):
-                        candidate_coords.append(element)
+        print_available_coords()  # Game feedback
 
-            # Now choosing coords that have received fire and testing for adjacents
-            best_candidate = None
-            for row in coord_objects:
-                for element in row:
-                    if element.get_is_revealed(USER) and element.get_has_boat(USER) and (
-                            not element.get_is_discarded(USER)):
-                        if calculate_adjacent(element) is not None:
-                            best_candidate = element
+        label = nStickyMain['label'].value() if shots[0].streak else ''
+        for shot in shots:
+            target = coord_objects[shot.row][shot.column]
 
-            # Choosing a target from availabe coords (giving priority to adjacents to already tested coords)
-            if best_candidate is not None:
-                target = calculate_adjacent(best_candidate)
+            if shot.previous is None:
+                log.info('\nCOM fires at: {}\n-------------------', target.get_name())
             else:
-                target = random.choice(candidate_coords)
+                log.info('\nCOM fires at: {}, from adjacents to previous shot at {}\n'
+                         '-------------------------------------------------------',
+                         target.get_name(), battleship_engine.cell_name(*shot.previous))
 
             if not showUserAllBoats:
                 target.show_boat(USER)
+            target.draw_fire(USER, shot.hit)
 
-            # Now checking if the shot was successful
-            print_available_coords()
-            nuke.tprint('\nCOM fires at: {}\n-------------------'.format(target.get_name()))  # Game feedback
-            if target.take_fire(USER):
-
-                if keep_tag:
-                    nStickyMain['label'].setValue(nStickyMain['label'].value() + ', at {}'.format(target.get_name()))
+            if shot.hit:
+                if shot.streak:
+                    label += ', at {}'.format(target.get_name())
                 else:
-                    nStickyMain['label'].setValue('COM has hit you at {}'.format(target.get_name()))
-
-                com_fires(target)
+                    label = 'COM has hit you at {}'.format(target.get_name())
+                if shot.sunk:
+                    label += ', sinking your boat of length {}'.format(battleship_engine.popcount(shot.sunk))
 
             else:
-
-                if keep_tag:
-                    nStickyMain['label'].setValue(
-                        nStickyMain['label'].value() + '\nAnd has missed the next shot at {}'.format(target.get_name()))
+                if shot.streak:
+                    label += '\nAnd has missed the next shot at {}'.format(target.get_name())
                 else:
-                    nStickyMain['label'].setValue('COM has missed at {}'.format(target.get_name()))
-
-        else:
+                    label = 'COM has missed at {}'.format(target.get_name())
 
-            # Calculating adjacent to previous coord
-            adjacentToPrevious = calculate_adjacent(previous_coord)
+        nStickyMain['label'].setValue(label)
 
-            # Choosing a target from availabe adjacents
-            if adjacentToPrevious is not None:
-                print_available_coords()
-                nuke.tprint('\nCOM fires at: {}, from adjacents to previous shot at {}\n'
-                            '-------------------------------------------------------'
-                            .format(adjacentToPrevious.get_name(), previous_coord.get_name()))
+    def on_boat_discarded(self, game, cells, length):
+        if not log.enabled(battleship_log.DEBUG):
+            return
 
-                if not showUserAllBoats:
-                    adjacentToPrevious.show_boat(USER)
+        names = [battleship_engine.cell_name(*game.board.position(cell)) for cell in cells]
 
-                # Now checking if the shot was successful
-                if adjacentToPrevious.take_fire(USER):
+        log.debug('\n\nUsed coords {} for discarding boat of lenght {}\n'
+                  '--------------------------------------', names, length)
+        log.debug('-{} and their adjacents have been discarded', ', '.join(names))
+        log.debug('\n{} BOAT OF LENGHT {} is discarded', 'X' * length, length)
+        log.debug('REMAINING BOATS: {}\n', game.boats)
 
-                    nStickyMain['label'].setValue(
-                        nStickyMain['label'].value() + ', at {}'.format(adjacentToPrevious.get_name()))
-                    com_fires(adjacentToPrevious, keep_tag=True)
+    def on_undo(self, game, state):
+        # Coords fired at since the snapshot the game went back to
+        for id in (COM, USER):
+            for cell in battleship_engine.iter_bits(state.revealed[id] & ~game.board.revealed[id]):
+                row, column = game.board.position(cell)
+                coord_objects[row][column].cover(id)
 
-                else:
+        log.info('\nLAST TURN UNDONE\n----------------')
+        nStickyMain['label'].setValue('Last turn undone')
+        kInfo.setValue('''How to to fire:
+-Select a coordinate (yellow dot node)
+-Press the FIRE! button''')
 
-                    nStickyMain['label'].setValue(
-                        nStickyMain['label'].value() + '\nAnd has missed the next shot at {}'
-                        .format(adjacentToPrevious.get_name()))
+    def on_game_over(self, game, winner):
 
+        # The game has finished during COM's turn
+        if winner == COM:
+            nStickyMain['note_font_size'].setValue(30)
+            if 'COM' in nStickyMain['label'].value():
+                nStickyMain['label'].setValue(
+                    "GAME IS OVER!\nNow COM's boats are being revealed\n<font size =2>" + nStickyMain['label'].value())
             else:
-
-                com_fires(keep_tag=True)
-
-    else:
-
-        nStickyMain['note_font_size'].setValue(30)
-        if 'COM' in nStickyMain['label'].value():
-            nStickyMain['label'].setValue(
-                "GAME IS OVER!\nNow COM's boats are being revealed\n<font size =2>" + nStickyMain['label'].value())
-        else:
-            nStickyMain['label'].setValue("GAME IS OVER!\nNow COM's boats are being revealed")
+                nStickyMain['label'].setValue("GAME IS OVER!\nNow COM's boats are being revealed")
 
         reveal_com_boats()
         end_game()
+        dump_profile()
 
 
-def calculate_adjacent(coord_object):
-    row = coord_object.get_row()
-    column = coord_object.get_column()
+# -------------------------------- GAMEPLAY FUNCTIONS -------------------------------- #
 
-    # Defining all 4 adjacents of given coord
-    right_adjacent = None
-    left_adjacent = None
-    up_adjacent = None
-    down_adjacent = None
+def user_fires():
 
-    if 0 <= column + 1 <= 9:
-        right_adjacent = coord_objects[row][column + 1]
+    if turn_in_flight:
+        _nuke.message('<font size=3>Please wait, COM is firing')
+        return
 
-    if 0 <= column - 1 <= 9:
-        left_adjacent = coord_objects[row][column - 1]
+    selected_nodes = _nuke.selectedNodes()
 
-    if 0 <= row - 1 <= 9:
-        up_adjacent = coord_objects[row - 1][column]
+    # Check if the fire input is correct
+    if len(selected_nodes) > 1:
 
-    if 0 <= row + 1 <= 9:
-        down_adjacent = coord_objects[row + 1][column]
+        _nuke.message('<font size=3>Please select only one node')
+        clear_selection()
 
-    adjacents_list = [right_adjacent, left_adjacent, up_adjacent, down_adjacent]
+    elif len(selected_nodes) == 0:
+        _nuke.message('<font size=3>Please select one of the yellow dots')
 
-    # Discarding by pairs of coords
-    if (right_adjacent is not None and right_adjacent.get_is_revealed(USER) and right_adjacent.get_has_boat(USER)) or (
-            left_adjacent is not None and left_adjacent.get_is_revealed(USER) and left_adjacent.get_has_boat(USER)):
+    else:
+        # Finding the selected coord
+        target = coord_index.get(selected_nodes[0].name())
 
-        try:
-            up_adjacent.set_is_discarded(USER)
-        except:
-            pass
-        try:
-            down_adjacent.set_is_discarded(USER)
-        except:
-            pass
+        if target is None:
+            _nuke.message('<font size=3>Please select one of the yellow dots')
+            selected_nodes[0].setSelected(False)
+            return
+
+        # The engine resolves the shot (and COM's turn if it is a miss), the renderer draws it
+        update_strategy()
+        threaded = com_threaded()
+        hit = game.user_fires(target.get_row(), target.get_column(), com_turn=not threaded)
+
+        if threaded and not hit and not game.game_is_over():
+            start_com_turn()
+
+        elif not game.game_is_over():
+            update_view()
+            save_state()
+            show_profile()
+
+        # The feedback of the whole turn is written at once
+        log.flush()
+
+
+def update_strategy():
+    # The strategy chosen in the Gameplay tab plays the next turns of COM
+    if kStrategy is None or kStrategy.value() == game.strategy.name:
+        return
+
+    game.set_strategy(battleship_strategies.make_strategy(kStrategy.value()))
+    log.info('\nCOM now plays with the {} strategy', game.strategy.name)
+
+
+def undo_turn():
+    # The last shot of the user, and the turn of COM that followed it, are taken back
+    if turn_in_flight:
+        return
+    if game.game_is_over() or not game.undo():
+        _nuke.message('<font size=3>There is no turn to undo')
+        return
+
+    clear_selection()
+    update_view()
+    save_state()
+    show_profile()
+    log.flush()
+
+
+# -------------------------------- COM TURNS -------------------------------- #
+
+# A turn of COM is being played on the worker thread, or drawn
+turn_in_flight = False
+
+
+def com_threaded():
+    return comThreaded and executeInMainThread is not None
+
+
+def start_com_turn():
+    # The worker plays on a copy of the game, so nothing the main thread does can interfere
+    global turn_in_flight
+    turn_in_flight = True
+
+    kMainButton.setEnabled(False)
+    kInfo.setValue('COM is firing...')
+
+    worker = threading.Thread(target=com_turn_worker, args=(game.copy(),), name='bShip_COM')
+    worker.daemon = True
+    worker.start()
+
+
+def com_turn_worker(engine):
+    '''
+    Worker thread: COM's turn on the copy of the game. Its shots go back to the main thread in batches,
+    and nothing here touches Nuke or the game that is drawn
+    '''
+    try:
+        start = battleship_profile.timer()
+        shots = engine.com_fires()
+        seconds = battleship_profile.timer() - start
+    except Exception:
+        executeInMainThread(com_turn_failed, args=(traceback.format_exc(),))
+        return
+
+    rng_state = engine.rng.getstate()
+    for first in range(0, len(shots), comDrawBatch):
+        last = first + comDrawBatch >= len(shots)
+        executeInMainThread(draw_com_shots, args=(shots[first:first + comDrawBatch],
+                                                  rng_state if last else None,
+                                                  seconds if first == 0 else None,
+                                                  engine.strategy if last else None))
+
+
+def draw_com_shots(shots, rng_state, seconds, strategy):
+    # Main thread: a batch of shots of COM is played on the game and drawn, the last one ends the turn
+    # (and brings back the strategy that has observed them on the worker)
+    if seconds is not None:
+        profiler.record('com_fires', seconds)
+
+    # Whatever happens, the last batch gives the FIRE! button back
+    try:
+        game.apply_turn(shots, rng_state, strategy)
+    except Exception:
+        log.info('The shots of COM could not be drawn:\n{}', traceback.format_exc())
+        raise
+    finally:
+        if rng_state is not None:
+            finish_com_turn()
+        else:
+            log.flush()
 
-    if (up_adjacent is not None and up_adjacent.get_is_revealed(USER) and up_adjacent.get_has_boat(USER)) or (
-            down_adjacent is not None and down_adjacent.get_is_revealed(USER) and down_adjacent.get_has_boat(USER)):
 
-        try:
-            right_adjacent.set_is_discarded(USER)
-        except:
-            pass
-        try:
-            left_adjacent.set_is_discarded(USER)
-        except:
-            pass
-
-    # Choosing the appropriate adjacent coord
-    for adjacent in adjacents_list:
-        if adjacent is None:
-            adjacents_list.remove(adjacent)
-
-    if right_adjacent is not None:
-
-        if right_adjacent.get_is_revealed(USER):
-
-            try:
-                adjacents_list.remove(right_adjacent)
-            except:
-                pass
-
-            if right_adjacent.get_has_boat(USER):
-
-                try:
-                    adjacents_list.remove(up_adjacent)
-                except:
-                    pass
-                try:
-                    adjacents_list.remove(down_adjacent)
-                except:
-                    pass
-
-    if left_adjacent is not None:
-
-        if left_adjacent.get_is_revealed(USER):
-
-            try:
-                adjacents_list.remove(left_adjacent)
-            except:
-                pass
-
-            if left_adjacent.get_has_boat(USER):
-
-                try:
-                    adjacents_list.remove(up_adjacent)
-                except:
-                    pass
-                try:
-                    adjacents_list.remove(down_adjacent)
-                except:
-                    pass
-
-    if up_adjacent is not None:
-
-        if up_adjacent.get_is_revealed(USER):
-
-            try:
-                adjacents_list.remove(up_adjacent)
-            except:
-                pass
-
-            if up_adjacent.get_has_boat(USER):
-
-                try:
-                    adjacents_list.remove(right_adjacent)
-                except:
-                    pass
-                try:
-                    adjacents_list.remove(left_adjacent)
-                except:
-                    pass
-
-    if down_adjacent is not None:
-
-        if down_adjacent.get_is_revealed(USER):
-
-            try:
-                adjacents_list.remove(down_adjacent)
-            except:
-                pass
-
-            if down_adjacent.get_has_boat(USER):
-
-                try:
-                    adjacents_list.remove(right_adjacent)
-                except:
-                    pass
-                try:
-                    adjacents_list.remove(left_adjacent)
-                except:
-                    pass
-
-    # Adjacent to return
-    if len(adjacents_list) > 0:
-        return random.choice(adjacents_list)
-    else:
-        return None
+def com_turn_failed(error):
+    # The turn is played again on the main thread
+    log.info('COM could not fire on its worker thread:\n{}', error)
+    try:
+        game.com_fires()
+    finally:
+        finish_com_turn()
 
 
-def discard_surrounding(coord_object):
-    coord_object.set_is_discarded(USER)
+def finish_com_turn():
+    global turn_in_flight
+    turn_in_flight = False
 
-    row = coord_object.get_row()
-    column = coord_object.get_column()
+    # At the end of the game every node is already gone
+    if not game.game_is_over():
+        kMainButton.setEnabled(True)
+        kInfo.setValue('''How to to fire:
+-Select a coordinate (yellow dot node)
+-Press the FIRE! button''')
 
-    surroundingList = []
+        update_view()
+        save_state()
+        show_profile()
 
-    for i in range(-1, 2):
-        for j in range(-1, 2):
-            if i != j and i != -j:
+    log.flush()
 
-                if (0 <= row + i <= 9) and (0 <= column + j <= 9):
-                    surroundingList.append(coord_objects[row + i][column + j])
 
-    for coord in surroundingList:
-        coord.set_is_discarded(USER)
+def print_available_coords():
+    if not log.enabled(battleship_log.DEBUG):
+        return
 
+    board = game.board
+    available_coords = [battleship_engine.cell_name(*board.position(cell))
+                        for cell in battleship_engine.iter_bits(board.full & ~board.discarded)]
 
-def discard_coords():
-    # Will be checked for every coord object
-    for row in coord_objects:
-        for element in row:
+    log.debug('\nAVAILABLE COORDS:\n-----------------\n{}', ','.join(available_coords))
 
-            if element.get_has_boat(USER) and element.get_is_revealed(USER):
-
-                if not element.get_is_discarded(USER):
-
-                    row = element.get_row()
-                    column = element.get_column()
-
-                    for i in range(5, 1, -1):
-
-                        if boatDict['{}_boat'.format(i)] != 0:
-
-                            right_adjacents = {'ID': 'RIGHT', 'coords': [], 'names': [], 'content': []}
-                            left_adjacents = {'ID': 'LEFT', 'coords': [], 'names': [], 'content': []}
-                            up_adjacents = {'ID': 'UP', 'coords': [], 'names': [], 'content': []}
-                            down_adjacents = {'ID': 'DOWN', 'coords': [], 'names': [], 'content': []}
-
-                            all_adjacents = [right_adjacents, left_adjacents, up_adjacents, down_adjacents]
-
-                            for N in range(-1, i + 1):
-
-                                if 0 <= column + N <= 9:
-                                    right_adjacents['coords'].append(coord_objects[row][column + N])
-                                    right_adjacents['names'].append(coord_objects[row][column + N].get_name())
-                                    if coord_objects[row][column + N].get_is_revealed(USER):
-                                        if coord_objects[row][column + N].get_has_boat(USER):
-                                            right_adjacents['content'].append('HIT')
-                                        else:
-                                            right_adjacents['content'].append('WATER')
-                                else:
-                                    right_adjacents['coords'].append(None)
-                                    right_adjacents['names'].append('OUT-OF-BOARD')
-                                    right_adjacents['content'].append('OUT')
-
-                                if 0 <= column - N <= 9:
-                                    left_adjacents['coords'].append(coord_objects[row][column - N])
-                                    left_adjacents['names'].append(coord_objects[row][column - N].get_name())
-                                    if coord_objects[row][column - N].get_is_revealed(USER):
-                                        if coord_objects[row][column - N].get_has_boat(USER):
-                                            left_adjacents['content'].append('HIT')
-                                        else:
-                                            left_adjacents['content'].append('WATER')
-                                else:
-                                    left_adjacents['coords'].append(None)
-                                    left_adjacents['names'].append('OUT-OF-BOARD')
-                                    left_adjacents['content'].append('OUT')
-
-                                if 0 <= row - N <= 9:
-                                    up_adjacents['coords'].append(coord_objects[row - N][column])
-                                    up_adjacents['names'].append(coord_objects[row - N][column].get_name())
-                                    if coord_objects[row - N][column].get_is_revealed(USER):
-                                        if coord_objects[row - N][column].get_has_boat(USER):
-                                            up_adjacents['content'].append('HIT')
-                                        else:
-                                            up_adjacents['content'].append('WATER')
-                                else:
-                                    up_adjacents['coords'].append(None)
-                                    up_adjacents['names'].append('OUT-OF-BOARD')
-                                    up_adjacents['content'].append('OUT')
-
-                                if 0 <= row + N <= 9:
-                                    down_adjacents['coords'].append(coord_objects[row + N][column])
-                                    down_adjacents['names'].append(coord_objects[row + N][column].get_name())
-                                    if coord_objects[row + N][column].get_is_revealed(USER):
-                                        if coord_objects[row + N][column].get_has_boat(USER):
-                                            down_adjacents['content'].append('HIT')
-                                        else:
-                                            down_adjacents['content'].append('WATER')
-                                else:
-                                    down_adjacents['coords'].append(None)
-                                    down_adjacents['names'].append('OUT-OF-BOARD')
-                                    down_adjacents['content'].append('OUT')
-
-                            # Checking if boat of lenght i can be discarded
-                            for dictionary in all_adjacents:
-
-                                if len(dictionary['content']) == i + 2 \
-                                        and dictionary['content'].count('HIT') == i \
-                                        and (dictionary['content'][0] in ('WATER', 'OUT')) \
-                                        and (dictionary['content'][i + 1] in ('WATER', 'OUT')):
-
-                                    nuke.tprint(
-                                        '\n\nUsed coord {} for discarding boat of lenght {}\n'
-                                        '--------------------------------------'
-                                        .format(element.get_name(), i))
-                                    nuke.tprint('DIRECTION: {}\nNAMES: {}\nCONTENTS: {}'
-                                                .format(dictionary['ID'], dictionary['names'], dictionary['content']))
-
-                                    for b in range(1, i + 1):
-                                        discard_surrounding(dictionary['coords'][b])
-                                        nuke.tprint('-' + dictionary['names'][b] + ' and its adjacents have been discarded')
-
-                                    nuke.tprint('\n{} BOAT OF LENGHT {} is discarded'.format('X' * i, i))
-                                    boatDict['{}_boat'.format(i)] -= 1
-                                    nuke.tprint('REMAINING BOATS: {}\n'.format(boatDict))
+def game_is_over():
+    return game.game_is_over()
 
-                else:
-                    calculate_adjacent(element)
 
+def end_game():
+    global _nuke
+
+    # Showing the winner
+    if game.winner() == COM:
+        _nuke.message('<b><font size=5>GAME OVER\n<font color = red>COM WINS')
+    else:
+        _nuke.message('<b><font size=5>GAME OVER\n<font color = green>YOU WIN')
 
-def discard_water():
+    # Scene restoration
+    _nuke.toNode('preferences')['DAGBackColor'].setValue(dagColor)
+
+    # Deletion of the nodes of the game (the rest of the script is left untouched)
+    stop_view_polling()
+    _nuke.removeKnobChanged(guard_positions)
+    set_resume_on_load(False)
+    registry.delete_all()
+
+    log.info('\n\n---------------------\n+++++ GAME OVER +++++\n---------------------')
+    save_replay()
+    log.flush()
+
+    # No more counting once the game is over
+    _nuke = nuke
 
-    for row in coord_objects:
-        for element in row:
 
-            if element.get_is_revealed(USER) and (not element.get_has_boat(USER)):
-                element.set_is_discarded(USER)
+# -------------------------------- SAVED GAMES -------------------------------- #
 
-            row = element.get_row()
-            column = element.get_column()
+# This script, run again by Nuke when a script with an unfinished game is opened. Pasted in the Script Editor, it is
+# the copy installed next to the engine (without one, games can not be resumed)
+if '__file__' in globals():
+    scriptFile = os.path.abspath(__file__)
+else:
+    scriptFile = os.path.join(os.path.dirname(os.path.abspath(battleship_engine.__file__)), 'battleship_exec.py')
+    if not os.path.isfile(scriptFile):
+        scriptFile = ''
 
-            # Defining all 4 adjacents of given coord
-            right_adjacent = None
-            left_adjacent = None
-            up_adjacent = None
-            down_adjacent = None
 
-            if 0 <= column + 1 <= 9:
-                right_adjacent = coord_objects[row][column + 1]
+def resume_command(if_undefined=False):
+    # Python that runs this script again when the opened script still has a saved game, only to resume it.
+    # It never starts a new game, and errors are printed instead of stopping the script from loading.
+    # The FIRE! button only needs it if_undefined: when the functions of the game are not defined yet
+    if not scriptFile:
+        return ''
+
+    return ("try:\n"
+            "    import os, nuke\n"
+            "    if {1}nuke.toNode('MAIN_bShip') is not None and nuke.toNode('MAIN_bShip').knob('bship_state') \\\n"
+            "            and nuke.toNode('MAIN_bShip')['bship_state'].value() and os.path.isfile({0!r}):\n"
+            "        __file__, bShipResumeOnly = {0!r}, True\n"
+            "        exec(compile(open(__file__).read(), __file__, 'exec'))\n"
+            "except Exception as error:\n"
+            "    nuke.tprint('The battleship game could not be resumed: {{}}'.format(error))\n"
+            ).format(scriptFile, "'user_fires' not in globals() and " if if_undefined else '')
 
-            if 0 <= column - 1 <= 9:
-                left_adjacent = coord_objects[row][column - 1]
 
-            if 0 <= row - 1 <= 9:
-                up_adjacent = coord_objects[row - 1][column]
+def set_resume_on_load(enabled):
+    command = resume_command()
+    if not command:
+        if enabled:
+            _nuke.tprint('This battleship game will not be resumed when the script is opened again: '
+                         'battleship_exec.py is not on NUKE_PATH')
+        return
 
-            if 0 <= row + 1 <= 9:
-                down_adjacent = coord_objects[row + 1][column]
+    on_load = _nuke.root()['onScriptLoad']
+    value = on_load.value().replace(command, '')
+    on_load.setValue(value + command if enabled else value)
 
-            if ((right_adjacent is not None and right_adjacent.get_is_revealed(USER)
-                 and (not right_adjacent.get_has_boat(USER))) or right_adjacent is None) \
-                    and ((left_adjacent is not None and left_adjacent.get_is_revealed(USER)
-                          and (not left_adjacent.get_has_boat(USER))) or left_adjacent is None) \
-                    and ((up_adjacent is not None and up_adjacent.get_is_revealed(USER)
-                          and (not up_adjacent.get_has_boat(USER))) or up_adjacent is None) \
-                    and ((down_adjacent is not None and down_adjacent.get_is_revealed(USER)
-                          and (not down_adjacent.get_has_boat(USER))) or down_adjacent is None):
 
-                element.set_is_discarded(USER)
+def save_state():
+    # Kept in the main node after every turn, and saved with the script
+    if replay is not None or game.game_is_over():
+        return
 
+    replay_bytes = recorder.log.to_bytes() if recorder.log is not None else b''
+    kState.setValue(battleship_state.dumps(battleship_state.SavedGame(game, showUserAllBoats, dagColor,
+                                                                      replay_bytes)))
 
-def print_available_coords():
 
-    nuke.tprint('\nAVAILABLE COORDS:\n-----------------')
-    available_coords = ''
+# -------------------------------- REPLAYS -------------------------------- #
 
-    for row in coord_objects:
-        for element in row:
+def unique_path(folder, extension):
+    # File named after the current time, with a number when a file of the same second is already there
+    stamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    path = os.path.join(folder, 'bShip_{}{}'.format(stamp, extension))
+    number = 1
+    while os.path.exists(path):
+        number += 1
+        path = os.path.join(folder, 'bShip_{}_{}{}'.format(stamp, number, extension))
+    return path
 
-            if not element.get_is_discarded(USER):
-                available_coords += element.get_name() + ','
 
-    nuke.tprint(available_coords)
+def save_replay():
+    if replay is not None or not replayFolder or recorder.log is None:
+        return
 
-def game_is_over():
-    user_all_revealed = True
-    com_all_revealed = True
+    path = unique_path(replayFolder, '.bsr')
+    try:
+        if not os.path.isdir(replayFolder):
+            os.makedirs(replayFolder)
+        recorder.log.save(path)
+        log.info('Game recorded at {}', path)
+    except (IOError, OSError, battleship_replay.ReplayError):
+        log.info('The game could not be recorded at {}', path)
 
-    for row in coord_objects:
-        for element in row:
 
-            if element.get_has_boat(USER) and not element.get_is_revealed(USER):
-                user_all_revealed = False
+def replay_next():
+    # Next shot of the user, or next turn of COM, of the recorded game
+    replay.step()
 
-            if element.get_has_boat(COM) and not element.get_is_revealed(COM):
-                com_all_revealed = False
+    if not game.game_is_over():
+        update_view()
+        show_profile()
+    log.flush()
 
-    return user_all_revealed or com_all_revealed
 
+def replay_to_end():
+    while not game.game_is_over() and replay.step():
+        pass
 
-def end_game():
-    # Showing the winner
-    userAllRevealed = True
+    if not game.game_is_over():
+        update_view()
+        show_profile()
+    log.flush()
 
-    for row in coord_objects:
-        for element in row:
 
-            if element.get_has_boat(USER) and not element.get_is_revealed(USER):
-                userAllRevealed = False
+# -------------------------------- PROFILING -------------------------------- #
+
+def instrument_game():
+    # Phases of the engine and of the renderer (the ones of the script are timed when the game starts)
+    profiler.instrument(game, 'com_fires')
+    profiler.instrument(game, 'observe', 'com_bookkeeping')
+    profiler.instrument(game, 'discard')
 
-    if userAllRevealed:
-        nuke.message('<b><font size=5>GAME OVER\n<font color = red>COM WINS')
-    else:
-        nuke.message('<b><font size=5>GAME OVER\n<font color = green>YOU WIN')
+    for listener in game.listeners:
+        if isinstance(listener, NukeRenderer):
+            for method in ('on_shot', 'on_turn', 'on_undo'):
+                profiler.instrument(listener, method, 'render')
+
+
+def show_profile():
+    # The time of user_fires is shown from the next turn on (it is still running)
+    if profiling:
+        kProfile.setValue(profiler.summary())
 
-    # Scene restoration
-    nuke.toNode('preferences')['DAGBackColor'].setValue(dagColor)
 
-    # Deletion of nodes
-    for node in nuke.allNodes():
-        if "bShip" in node['name'].value() or node.Class() == 'NoOp':
-            nuke.delete(node)
+def dump_profile(path=None):
+    # The whole profile as JSON, written at the end of the game when profileFolder is set
+    if path is None:
+        if not profiling or not profileFolder:
+            return
+        path = unique_path(profileFolder, '.json')
 
-    nuke.tprint('\n\n---------------------\n+++++ GAME OVER +++++\n---------------------')
+    try:
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        profiler.dump(path)
+        log.info('Profile of the game written at {}', path)
+    except (IOError, OSError):
+        log.info('The profile could not be written at {}', path)
+    log.flush()
 
 
 # -------------------------------- 'EXTRA' FUNCTIONS -------------------------------- #
@@ -1003,7 +1351,8 @@ def print_positions():
             else:
                 text_com += '--'
 
-    nuke.tprint('\n\nCOM BOATS\n' + text_com + '\n\nUSER BOATS\n' + text_user)
+    log.info('\n\nCOM BOATS\n{}\n\nUSER BOATS\n{}', text_com, text_user)
+    log.flush()
 
 
 # -------------------------------- GAMEPLAY -------------------------------- #
@@ -1012,68 +1361,240 @@ def print_positions():
 # Start of game
 # ------------------------------------------------------------
 
-nuke.tprint('\n\n--- NEW GAME STARTED AT {} ---'.format(str(datetime.datetime.now())[:16]))
-
-# Cleaning scene (supposed to be empty, just with a viewer node)
-# ------------------------------------------------------------
-
-for n in nuke.allNodes('Viewer'):
-    nuke.delete(n)
+# Time and Nuke API calls of every phase of the game. The calls are counted through _nuke, which only the game uses:
+# the nuke module itself is left untouched for the rest of the session
+profiler = battleship_profile.Profiler(profileWindow, profiling)
+_nuke = battleship_profile.CountingModule(nuke, profiler) if profiling else nuke
+
+# Game log, written to the script editor in batches
+log = battleship_log.GameLog(logLevel, _nuke.tprint)
+
+# Every node that the game creates is registered here
+registry = NodeRegistry()
+
+for function_name, phase_name in (('board_creation', 'board_build'), ('coord_objects_creation', 'coord_objects'),
+                                  ('set_board', 'set_board'), ('user_fires', 'user_fires'),
+                                  ('update_view', 'update_view'), ('save_state', 'save_state'),
+                                  ('end_game', 'end_game')):
+    profiler.instrument(globals(), function_name, phase_name)
+
+# A game saved in this script is resumed instead of starting a new one. When the script is run by the onScriptLoad
+# hook, it only resumes
+resume_only = globals().pop('bShipResumeOnly', False)
+nStickyMain = _nuke.toNode('MAIN_bShip')
+saved_state = nStickyMain['bship_state'].value() if nStickyMain is not None and nStickyMain.knob('bship_state') else ''
+
+if resume_only and not saved_state:
+    raise RuntimeError('No saved battleship game to resume')
+
+if saved_state:
+
+    # Resuming the saved game: its nodes are already in the script
+    # ------------------------------------------------------------
+
+    log.info('\n\n--- GAME RESUMED AT {} ---', str(datetime.datetime.now())[:16])
+
+    strategy_knob = nStickyMain.knob('com_strategy')
+    try:
+        saved = battleship_state.loads(saved_state, battleship_strategies.make_strategy(
+            strategy_knob.value() if strategy_knob is not None else comStrategy))
+    except battleship_state.StateError as error:
+        _nuke.message('<font size=3>The saved game can not be resumed:\n{}'.format(error))
+        raise
+    if saved.game.board.size != squareNumber:
+        _nuke.message('<font size=3>The saved game is on a {0}x{0} board, '
+                     'set squareNumber to {0} to resume it'.format(saved.game.board.size))
+        raise RuntimeError('Saved game of a {0}x{0} board'.format(saved.game.board.size))
+
+    game = saved.game
+    dagColor = saved.dag_color
+    showUserAllBoats = saved.show_user_boats
+    _nuke.toNode('preferences')['DAGBackColor'].setValue(backColor)
+
+    kMainButton = nStickyMain['py_main_button']
+    kInfo = nStickyMain['Z_info']
+    kProfile = nStickyMain['Z_profile']
+    kStrategy = strategy_knob
+    kState = nStickyMain['bship_state']
+
+    registry.add('main', nStickyMain)
+    registry.add_board([node for node in _nuke.allNodes() if 'bShip' in node.name() and node.name() != 'MAIN_bShip'])
+
+    game.subscribe(NukeRenderer())
+
+    # The recording goes on
+    recorder = battleship_replay.ReplayRecorder()
+    if saved.replay:
+        recorder.resume(game, battleship_replay.ReplayLog.from_bytes(saved.replay))
+    game.subscribe(recorder)
+    replay = None
+    instrument_game()
+
+    coord_objects = coord_objects_creation()
+    for row in coord_objects:
+        for element in row:
+            element.restore_display()
+
+            # Mosaics that the level of detail had created
+            for side, dots in ((COM, element.com_dots), (USER, element.user_dots)):
+                if dots and lod_enabled():
+                    refined_coords.add((side, element.get_row(), element.get_column()))
+    update_view()
+
+else:
+
+    log.info('\n\n--- NEW GAME STARTED AT {} ---', str(datetime.datetime.now())[:16])
+
+    # Boards too small for any boat are stopped before touching the scene
+    if not boatDict and not replayFile:
+        _nuke.message('<font size=3>No boat fits on a {0}x{0} board, '
+                     'set squareNumber to 2 or more'.format(squareNumber))
+        raise RuntimeError('No boat fits on a {0}x{0} board'.format(squareNumber))
+    log.info('Fleet of the {0}x{0} board: {1}', squareNumber, battleship_layouts.fleet_lengths(boatDict))
+
+    # Cleaning scene (supposed to be empty, just with a viewer node)
+    # ------------------------------------------------------------
+
+    for n in _nuke.allNodes('Viewer'):
+        _nuke.delete(n)
+
+    # Main playing node
+    # ------------------------------------------------------------
+
+    nStickyMain = _nuke.nodes.StickyNote(name='MAIN_bShip',
+                                        label='',
+                                        note_font='Arial Bold',
+                                        note_font_size=40,
+                                        tile_color=backColor,
+                                        xpos=totalSize + 150,
+                                        ypos=totalSize + user_com_distance - (2.2 * squareSize))
+
+    # Main button: will change through the game
+    kMainButton = _nuke.PyScript_Knob('py_main_button', '<b><font size = 6>...starting')
+    nStickyMain.addKnob(kMainButton)
+
+    # Divider
+    kDivider = _nuke.Text_Knob('divider', '')
+    nStickyMain.addKnob(kDivider)
+
+    # Information knob: tells the user how the gameplay develops
+    kInfo = _nuke.Text_Knob('Z_info', '', "<b>Information")
+    nStickyMain.addKnob(kInfo)
+
+    # Profile knob: recent time of every phase of the game (read only, empty without profiling)
+    kProfile = _nuke.Text_Knob('Z_profile', '<b>Profile', '')
+    nStickyMain.addKnob(kProfile)
+
+    # Level of detail: the framed coords get their full mosaic after every shot, when the DAG stops moving (with Qt)
+    # and when the button is pressed
+    if lod_enabled():
+        kViewButton = _nuke.PyScript_Knob('py_view_button', '<b>Refine framed coords',
+                                         resume_command(if_undefined=True) + 'update_view()')
+        kViewButton.setTooltip('Gives their full mosaic to the coords framed in the DAG now')
+        nStickyMain.addKnob(kViewButton)
+
+        if view_polling():
+            view_info = ('Big board: only the framed coords get their full mosaic.\n'
+                         'They are refined a moment after the DAG stops moving')
+        else:
+            view_info = ('Big board: only the framed coords get their full mosaic.\n'
+                         'After panning or zooming the DAG, press <b>Refine framed coords</b>\n'
+                         '(they are also refined after every shot)')
+        kViewInfo = _nuke.Text_Knob('Z_view_info', '', view_info)
+        nStickyMain.addKnob(kViewInfo)
+
+    # Saved state of the game (hidden), to resume it when the script is opened again
+    kState = _nuke.String_Knob('bship_state', '')
+    kState.setFlag(_nuke.INVISIBLE)
+    nStickyMain.addKnob(kState)
+
+    nStickyMain['User'].setName('Gameplay')
+    registry.add('main', nStickyMain)
+
+    # Framing the main node
+    clear_selection()
+
+    nStickyMain.setSelected(True)
+    _nuke.zoomToFitSelected()
+    _nuke.show(nStickyMain)
+    nStickyMain.setSelected(False)
+
+    # Game engine, drawn on the DAG by the renderer
+    # ------------------------------------------------------------
+
+    if replayFile:
+        replay_log = battleship_replay.ReplayLog.load(replayFile)
+        if replay_log.size != squareNumber:
+            _nuke.message('<font size=3>The recorded game is on a {0}x{0} board, '
+                         'set squareNumber to {0} to watch it'.format(replay_log.size))
+            raise RuntimeError('Replay of a {0}x{0} board'.format(replay_log.size))
+        boatDict = replay_log.fleet
+
+    game = battleship_engine.Game(squareNumber, boatDict, strategy=battleship_strategies.make_strategy(comStrategy),
+                                  bank=None if replayFile else open_layout_bank())
+    game.subscribe(NukeRenderer())
+
+    # Recording of the game, or the recorded game that is watched instead
+    recorder = battleship_replay.ReplayRecorder()
+    replay = None
+    if replayFile:
+        replay = battleship_replay.Replay(replay_log, game)
+    else:
+        game.subscribe(recorder)
+    instrument_game()
 
-# Main playing node
-# ------------------------------------------------------------
+    # Creation of board and coord objects
+    # ------------------------------------------------------------
 
-nStickyMain = nuke.nodes.StickyNote(name='MAIN_bShip',
-                                    label='',
-                                    note_font='Arial Bold',
-                                    note_font_size=40,
-                                    tile_color=backColor,
-                                    xpos=totalSize + 150,
-                                    ypos=totalSize + user_com_distance - (2.2 * squareSize))
+    board_creation()
+    coord_objects = coord_objects_creation()
 
-# Main button: will change through the game
-kMainButton = nuke.PyScript_Knob('py_main_button', '<b><font size = 6>...starting')
-nStickyMain.addKnob(kMainButton)
+    # Setting the boats on the board
+    # ------------------------------------------------------------
 
-# Divider
-kDivider = nuke.Text_Knob('divider', '')
-nStickyMain.addKnob(kDivider)
+    showUserAllBoats = replay is not None or _nuke.ask('<b><font size=4>Do you wish to see where your own boats are?')
+    set_board()
+    update_view()
 
-# Information knob: tells the user how the gameplay develops
-kInfo = nuke.Text_Knob('Z_info', '', "<b>Information")
-nStickyMain.addKnob(kInfo)
+    # When watching a recorded game, the main button plays it turn by turn
+    if replay is not None:
+        kMainButton.setLabel('<b><font size = 6>NEXT TURN')
+        kMainButton.setValue('replay_next()')
+        kInfo.setValue('''Watching a recorded game:
+-Press NEXT TURN to see the next shot of the user, or turn of COM''')
 
-nStickyMain['User'].setName('Gameplay')
+        kReplayButton = _nuke.PyScript_Knob('py_replay_button', '<b>To the end', 'replay_to_end()')
+        nStickyMain.addKnob(kReplayButton)
+        kStrategy = None
 
-# Framing the main node
-for n in nuke.allNodes():
-    n.setSelected(False)
+    # Otherwise the last turns can be taken back, and the strategy of COM can be changed
+    else:
+        kUndoButton = _nuke.PyScript_Knob('py_undo_button', '<b>Undo last turn',
+                                         resume_command(if_undefined=True) + 'undo_turn()')
+        nStickyMain.addKnob(kUndoButton)
 
-nStickyMain.setSelected(True)
-nuke.zoomToFitSelected()
-nuke.show(nStickyMain)
-nStickyMain.setSelected(False)
+        kStrategy = _nuke.Enumeration_Knob('com_strategy', 'COM strategy', battleship_strategies.STRATEGIES)
+        kStrategy.setValue(game.strategy.name)
+        nStickyMain.addKnob(kStrategy)
 
-# Creation of board and coord objects
+# Protecting the nodes from being moved
 # ------------------------------------------------------------
 
-board_creation()
-coord_objects = coord_objects_creation()
+registry.lock()
+_nuke.removeKnobChanged(guard_positions)
+_nuke.addKnobChanged(guard_positions)
 
-# Setting the boats on the board
-# ------------------------------------------------------------
-
-showUserAllBoats = nuke.ask('<b><font size=4>Do you wish to see where your own boats are?')
-set_board()
+# Refining the framed coords when the DAG is panned or zoomed
+start_view_polling()
 
-# Protecting the nodes from being moved
+# Saving the game in the script, and resuming it when the script is opened again
 # ------------------------------------------------------------
 
-for n in nuke.allNodes():
+if replay is None:
+    save_state()
+    set_resume_on_load(True)
 
-    if 'bShip' in n.name() or n.Class == 'NoOp':
-        y = n['ypos'].value()
-        x = n['xpos'].value()
+show_profile()
 
-        n['knobChanged'].setValue("nuke.thisNode()['xpos'].setValue({}) , nuke.thisNode()['ypos'].setValue({})"
-                                  "".format(x, y))
+# Everything logged while setting up the game
+log.flush()
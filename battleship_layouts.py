@@ -0,0 +1,198 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_layouts.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Random generation of valid layouts for any board size and fleet. Boats never touch each other
+       (not even by their ends), which is the rule the discarding logic of COM relies on.
+       Layouts are bitmasks: bit (row * size + column) is set where there is a boat
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import random
+import binascii
+
+
+# -------------------------------- FLEET -------------------------------- #
+
+def fleet_lengths(boats):
+    '''
+    Lengths of all the boats of a fleet like {'5_boat': 1, '3_boat': 2}, longest first
+    '''
+    lengths = []
+    for boat_key, count in boats.items():
+        lengths.extend([int(boat_key.split('_')[0])] * count)
+    return sorted(lengths, reverse=True)
+
+
+_scaled_cache = {}
+
+
+def scaled_fleet(boats, size, base_size=10):
+    '''
+    Fleet for a board of the given size, with as many boats per coord as the given fleet has on its base board.
+    Boats longer than the side of the board are left out, and the longest boats are taken out one by one while
+    the fleet does not fit. It is empty when no boat fits on the board
+    '''
+    key = (tuple(sorted(boats.items())), size, base_size)
+    if key not in _scaled_cache:
+        scale = float(size * size) / (base_size * base_size)
+
+        fleet = {}
+        for boat_key, count in boats.items():
+            if count and int(boat_key.split('_')[0]) <= size:
+                fleet[boat_key] = max(1, int(round(count * scale)))
+
+        while fleet and not fleet_fits(size, fleet):
+            longest = '{}_boat'.format(fleet_lengths(fleet)[0])
+            fleet[longest] -= 1
+            if not fleet[longest]:
+                del fleet[longest]
+
+        _scaled_cache[key] = fleet
+    return dict(_scaled_cache[key])
+
+
+def fleet_fits(size, boats):
+    # Whether a layout of the fleet is found on the board (always the same search, so the answer never changes)
+    try:
+        random_fleet(size, boats, random.Random(0))
+    except ValueError:
+        return False
+    return True
+
+
+# -------------------------------- PLACEMENTS -------------------------------- #
+
+_placements_cache = {}
+
+
+def placement_candidates(size, length):
+    '''
+    Every position of a boat of the given length on the board, as pairs of masks (boat, boat and its adjacents).
+    They are computed once per board size and length
+    '''
+    key = (size, length)
+    if key in _placements_cache:
+        return _placements_cache[key]
+
+    candidates = []
+    directions = [(0, 1)] if length == 1 else [(0, 1), (1, 0)]
+    for d_row, d_column in directions:
+        for row in range(size - d_row * (length - 1)):
+            for column in range(size - d_column * (length - 1)):
+
+                boat = 0
+                halo = 0
+                for N in range(length):
+                    boat_row = row + d_row * N
+                    boat_column = column + d_column * N
+                    boat |= 1 << (boat_row * size + boat_column)
+
+                    for halo_row, halo_column in ((boat_row, boat_column),
+                                                  (boat_row - 1, boat_column), (boat_row + 1, boat_column),
+                                                  (boat_row, boat_column - 1), (boat_row, boat_column + 1)):
+                        if 0 <= halo_row < size and 0 <= halo_column < size:
+                            halo |= 1 << (halo_row * size + halo_column)
+
+                candidates.append((boat, halo))
+
+    _placements_cache[key] = candidates
+    return candidates
+
+
+# -------------------------------- GENERATION -------------------------------- #
+
+def random_fleet(size, boats, rng=random, attempts=20, restarts=100):
+    '''
+    Masks of the boats of a random valid layout, in the order of fleet_lengths().
+    Every boat tries a few random placements, and only looks through all of them when the board is crowded
+    '''
+    lengths = fleet_lengths(boats)
+
+    for _ in range(restarts):
+        occupied = 0  # Boats placed so far and their adjacents
+        ships = []
+
+        for length in lengths:
+            candidates = placement_candidates(size, length)
+
+            for _ in range(attempts):
+                boat, halo = rng.choice(candidates)
+                if not boat & occupied:
+                    break
+            else:
+                free = [candidate for candidate in candidates if not candidate[0] & occupied]
+                if not free:
+                    break
+                boat, halo = rng.choice(free)
+
+            ships.append(boat)
+            occupied |= halo
+
+        else:
+            return ships
+
+    raise ValueError('The fleet {} does not fit on a {}x{} board'.format(boats, size, size))
+
+
+def random_layout(size, boats, rng=random):
+    layout = 0
+    for ship in random_fleet(size, boats, rng):
+        layout |= ship
+    return layout
+
+
+def random_layouts(count, size, boats, rng=random):
+    '''
+    Bulk generation of layouts, for simulations
+    '''
+    return [random_layout(size, boats, rng) for _ in range(count)]
+
+
+# -------------------------------- CONVERSIONS -------------------------------- #
+
+def layout_from_matrix(matrix):
+    size = len(matrix)
+    layout = 0
+    for i in range(size):
+        for j in range(size):
+            if matrix[i][j]:
+                layout |= 1 << (i * size + j)
+    return layout
+
+
+def layout_to_matrix(layout, size):
+    return [[int(layout >> (i * size + j) & 1) for j in range(size)] for i in range(size)]
+
+
+def mask_bytes(size):
+    # Bytes of a mask of the board in the binary files (replays, saved games, layout banks)
+    return (size * size + 7) // 8
+
+
+def mask_to_bytes(mask, n_bytes):
+    # Big-endian bytes of a mask
+    return binascii.unhexlify('%0*x' % (n_bytes * 2, mask))
+
+
+# Masks are read from bytes on every pick of a layout bank: Python 3 does it directly
+if hasattr(int, 'from_bytes'):
+    def mask_from_bytes(data):
+        return int.from_bytes(data, 'big')
+else:
+    def mask_from_bytes(data):
+        return int(binascii.hexlify(data), 16) if data else 0
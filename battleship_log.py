@@ -0,0 +1,85 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_log.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Game log with levels (off, info, debug). Messages are kept in memory, in a ring buffer, and written
+       in batches. Messages are only formatted when their level is enabled
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import sys
+from collections import deque
+
+
+# -------------------------------- LEVELS -------------------------------- #
+
+OFF = 0
+INFO = 1
+DEBUG = 2
+
+LEVELS = {'off': OFF, 'info': INFO, 'debug': DEBUG}
+
+
+def write_to_stdout(text):
+    sys.stdout.write(text + '\n')
+
+
+# -------------------------------- LOG -------------------------------- #
+
+class GameLog(object):
+    '''
+    Keeps the last messages in memory and hands them to the writer (nuke.tprint inside Nuke) in batches:
+    when batch_size messages are waiting, or when flush() is called
+    '''
+
+    def __init__(self, level='info', writer=write_to_stdout, capacity=1000, batch_size=100):
+        self.level = LEVELS[level] if level in LEVELS else level
+        self.writer = writer
+        self.records = deque(maxlen=capacity)  # Last messages, written or not
+        self.pending = []  # Messages not written yet
+        self.batch_size = batch_size
+
+    def enabled(self, level):
+        return level <= self.level
+
+    def log(self, level, message, *args):
+        if level > self.level:
+            return
+
+        if args:
+            message = message.format(*args)
+        self.records.append(message)
+        self.pending.append(message)
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def info(self, message, *args):
+        self.log(INFO, message, *args)
+
+    def debug(self, message, *args):
+        self.log(DEBUG, message, *args)
+
+    def flush(self):
+        if self.pending:
+            text = '\n'.join(self.pending)
+            del self.pending[:]
+            self.writer(text)
+
+    def dump(self):
+        # Every message still in the buffer, to look back at the game
+        return '\n'.join(self.records)
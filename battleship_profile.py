@@ -0,0 +1,196 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_profile.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Lightweight profiling of the phases of a game (board build, COM's turns, drawing...): wall time of every
+       call and the calls to the Nuke API made meanwhile. Averages of the last calls are shown during the game,
+       and the whole profile can be written as JSON
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import json
+import time
+from collections import deque
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+# -------------------------------- PHASES -------------------------------- #
+
+class PhaseStats(object):
+
+    def __init__(self, window):
+        self.count = 0
+        self.total = 0.0
+        self.longest = 0.0
+        self.recent = deque(maxlen=window)  # Seconds of the last calls
+        self.recent_calls = deque(maxlen=window)  # Nuke API calls of the same last calls
+        self.calls = {}  # Nuke API calls made by the phase itself, by name
+        self.pending_calls = 0  # Nuke API calls of the call running now
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+        self.recent_calls.append(self.pending_calls)
+        self.pending_calls = 0
+        if seconds > self.longest:
+            self.longest = seconds
+
+    def count_call(self, call, number):
+        self.calls[call] = self.calls.get(call, 0) + number
+        self.pending_calls += number
+
+    def recent_mean(self):
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+    def recent_calls_mean(self):
+        return float(sum(self.recent_calls)) / len(self.recent_calls) if self.recent_calls else 0.0
+
+    def to_dict(self):
+        return {'count': self.count,
+                'total_ms': 1000 * self.total,
+                'mean_ms': 1000 * self.total / self.count if self.count else 0.0,
+                'recent_mean_ms': 1000 * self.recent_mean(),
+                'recent_mean_calls': self.recent_calls_mean(),
+                'max_ms': 1000 * self.longest,
+                'calls': dict(self.calls)}
+
+
+class Profiler(object):
+    '''
+    Wall time and Nuke API calls per phase. Phases can be nested: the time and calls of a phase do not include
+    the ones of the phases called from it, so the phases of a turn add up to the whole turn.
+    A disabled profiler leaves the functions untouched, so it costs nothing
+    '''
+
+    OUTSIDE = 'other'  # Phase of the calls made outside of every phase
+
+    def __init__(self, window=20, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.phases = {}  # PhaseStats by name
+        self.order = []  # Names of the phases, in the order they are first called
+        self.stack = []  # [phase name, start, seconds of the nested phases] of the phases running now
+
+    def stats(self, name):
+        if name not in self.phases:
+            self.phases[name] = PhaseStats(self.window)
+            self.order.append(name)
+        return self.phases[name]
+
+    def start(self, name):
+        self.stack.append([name, timer(), 0.0])
+
+    def stop(self):
+        name, start, nested = self.stack.pop()
+        elapsed = timer() - start
+        self.stats(name).add(elapsed - nested)
+
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+    def timed(self, name, function):
+        '''
+        The function, timed as the given phase
+        '''
+        if not self.enabled:
+            return function
+
+        def wrapper(*args, **kwargs):
+            self.start(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.stop()
+
+        wrapper.__name__ = getattr(function, '__name__', name)
+        wrapper.__doc__ = getattr(function, '__doc__', None)
+        return wrapper
+
+    def instrument(self, owner, attribute, name=None):
+        # Replaces a method of an object (or a function of a namespace) by its timed version
+        if isinstance(owner, dict):
+            owner[attribute] = self.timed(name or attribute, owner[attribute])
+        else:
+            setattr(owner, attribute, self.timed(name or attribute, getattr(owner, attribute)))
+
+    def record(self, name, seconds):
+        # Time of a phase measured elsewhere (on another thread)
+        self.stats(name).add(seconds)
+
+    def count(self, call, number=1):
+        # Calls to the API, added to the phase running now
+        self.stats(self.stack[-1][0] if self.stack else self.OUTSIDE).count_call(call, number)
+
+    # REPORTS
+    def summary(self):
+        '''
+        Mean time and Nuke API calls of the last calls of every phase, as lines of text
+        '''
+        lines = []
+        for name in self.order:
+            stats = self.phases[name]
+            if not stats.count:
+                continue
+            lines.append('{}: {:.2f} ms | {:.0f} Nuke calls (last {})'.format(
+                name, 1000 * stats.recent_mean(), stats.recent_calls_mean(), len(stats.recent)))
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        return {'window': self.window,
+                'phases': [dict(stats.to_dict(), name=name) for name, stats in
+                           ((name, self.phases[name]) for name in self.order)]}
+
+    def dump(self, path):
+        with open(path, 'w') as profile_file:
+            json.dump(self.to_dict(), profile_file, indent=2, sort_keys=True)
+
+
+# -------------------------------- API CALLS -------------------------------- #
+
+class CountingModule(object):
+    '''
+    Stands for a module (nuke) and counts the calls made to its functions and classes in the profiler.
+    'nodes' gives the node constructors, counted as 'create'. Every attribute is looked up once
+    '''
+
+    def __init__(self, module, profiler, call_prefix=''):
+        self._module = module
+        self._profiler = profiler
+        self._call_prefix = call_prefix
+
+    def __getattr__(self, attribute):
+        value = getattr(self._module, attribute)
+
+        if attribute == 'nodes' and not self._call_prefix:
+            value = CountingModule(value, self._profiler, 'create')
+        elif callable(value):
+            value = self.counted(self._call_prefix or attribute, value)
+
+        # Found directly from now on
+        setattr(self, attribute, value)
+        return value
+
+    def counted(self, call, function):
+        profiler = self._profiler
+
+        def wrapper(*args, **kwargs):
+            profiler.count(call)
+            return function(*args, **kwargs)
+
+        return wrapper
@@ -0,0 +1,370 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_replay.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Compact binary record of a game (board size, fleet, strategy and seed of COM, layouts and two bytes per shot)
+       and its replay, following the recorded shots or playing COM's turns again to check that they are the same.
+       Example: python battleship_replay.py bShip_2018-09-23_18-30-00.bsr --simulate
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import struct
+import argparse
+
+import battleship_engine
+import battleship_strategies
+from battleship_engine import USER, COM
+from battleship_layouts import mask_bytes, mask_to_bytes, mask_from_bytes
+
+
+# -------------------------------- LOG FORMAT -------------------------------- #
+
+# Header: magic, version, board size, seed of COM, number of boat lengths in the fleet.
+# Then (length, count) per boat length, the name of COM's strategy (its length and ASCII bytes), both layouts as
+# big-endian bitmasks, the changes of strategy (count, then shot number and name of every one), the decisions of COM
+# that went over their time budget (count, then shot number and whether the strategy's target was played) and one
+# word per shot: the side that receives it in the highest bit, and its coord in the rest.
+# Logs of version 1 have no strategy (COM played with the heuristic), logs of version 2 have no changes nor overruns
+MAGIC = b'BSHP'
+VERSION = 3
+HEADER = struct.Struct('>4sBBIB')
+FLEET_ENTRY = struct.Struct('>BH')
+NAME_LENGTH = struct.Struct('>B')
+COUNT = struct.Struct('>I')
+SWITCH = struct.Struct('>I')
+OVERRUN = struct.Struct('>IB')
+
+SIDE_BIT = 0x8000
+MAX_SIZE = 181  # Largest board whose coords fit in the 15 bits of a shot
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayMismatch(ReplayError):
+    '''
+    A replayed game has taken a different shot than the recorded one
+    '''
+
+    def __init__(self, index, recorded, replayed):
+        ReplayError.__init__(self, 'Shot {}: recorded {}, replayed {}'.format(index, recorded, replayed))
+        self.index = index
+        self.recorded = recorded
+        self.replayed = replayed
+
+
+class ReplayLog(object):
+    '''
+    Everything needed to play a game again: shots are (side that receives them, coord), changes of strategy are
+    (number of the first shot of COM's new strategy, its name) and overruns are (number of the shot whose choice went
+    over the time budget, whether the strategy's target was played)
+    '''
+
+    def __init__(self, size, fleet, seed, user_layout, com_layout, shots=None, strategy='heuristic', switches=None,
+                 overruns=None):
+        self.size = size
+        self.fleet = dict(fleet)
+        self.seed = seed
+        self.user_layout = user_layout
+        self.com_layout = com_layout
+        self.shots = list(shots or [])
+        self.strategy = strategy  # Name of COM's strategy when the game starts
+        self.switches = list(switches or [])
+        self.overruns = list(overruns or [])
+
+    def strategy_at(self, index):
+        # Name of COM's strategy for the given shot
+        name = self.strategy
+        for first, switch in self.switches:
+            if first <= index:
+                name = switch
+        return name
+
+    def __eq__(self, other):
+        return isinstance(other, ReplayLog) and self.to_bytes() == other.to_bytes()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def to_bytes(self):
+        if self.size > MAX_SIZE:
+            raise ReplayError('Boards bigger than {0}x{0} can not be recorded'.format(MAX_SIZE))
+
+        lengths = sorted((int(boat_key.split('_')[0]), count) for boat_key, count in self.fleet.items())
+        parts = [HEADER.pack(MAGIC, VERSION, self.size, self.seed, len(lengths))]
+        parts.extend(FLEET_ENTRY.pack(length, count) for length, count in lengths)
+        strategy = self.strategy.encode('ascii')
+        parts.append(NAME_LENGTH.pack(len(strategy)) + strategy)
+        parts.append(mask_to_bytes(self.user_layout, mask_bytes(self.size)))
+        parts.append(mask_to_bytes(self.com_layout, mask_bytes(self.size)))
+
+        parts.append(COUNT.pack(len(self.switches)))
+        for index, name in self.switches:
+            name = name.encode('ascii')
+            parts.append(SWITCH.pack(index) + NAME_LENGTH.pack(len(name)) + name)
+        parts.append(COUNT.pack(len(self.overruns)))
+        parts.extend(OVERRUN.pack(index, played) for index, played in self.overruns)
+
+        parts.append(struct.pack('>{}H'.format(len(self.shots)),
+                                 *[(SIDE_BIT if side == USER else 0) | cell for side, cell in self.shots]))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, size, seed, n_lengths = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            raise ReplayError('Not a battleship replay (or not of version {} or older)'.format(VERSION))
+        offset = HEADER.size
+
+        fleet = {}
+        for _ in range(n_lengths):
+            length, count = FLEET_ENTRY.unpack_from(data, offset)
+            fleet['{}_boat'.format(length)] = count
+            offset += FLEET_ENTRY.size
+
+        strategy = 'heuristic'
+        if version >= 2:
+            name_length, = NAME_LENGTH.unpack_from(data, offset)
+            offset += NAME_LENGTH.size
+            strategy = data[offset:offset + name_length].decode('ascii')
+            offset += name_length
+
+        n_bytes = mask_bytes(size)
+        user_layout = mask_from_bytes(data[offset:offset + n_bytes])
+        com_layout = mask_from_bytes(data[offset + n_bytes:offset + 2 * n_bytes])
+        offset += 2 * n_bytes
+
+        switches = []
+        overruns = []
+        if version >= 3:
+            n_switches, = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            for _ in range(n_switches):
+                index, = SWITCH.unpack_from(data, offset)
+                name_length, = NAME_LENGTH.unpack_from(data, offset + SWITCH.size)
+                offset += SWITCH.size + NAME_LENGTH.size
+                switches.append((index, data[offset:offset + name_length].decode('ascii')))
+                offset += name_length
+
+            n_overruns, = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            for _ in range(n_overruns):
+                index, played = OVERRUN.unpack_from(data, offset)
+                overruns.append((index, bool(played)))
+                offset += OVERRUN.size
+
+        if (len(data) - offset) % 2:
+            raise ReplayError('Truncated replay')
+        words = struct.unpack_from('>{}H'.format((len(data) - offset) // 2), data, offset)
+        shots = [(USER if word & SIDE_BIT else COM, word & ~SIDE_BIT) for word in words]
+
+        return cls(size, fleet, seed, user_layout, com_layout, shots, strategy, switches, overruns)
+
+    def save(self, path):
+        with open(path, 'wb') as replay_file:
+            replay_file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as replay_file:
+            return cls.from_bytes(replay_file.read())
+
+
+# -------------------------------- RECORDING -------------------------------- #
+
+class ReplayRecorder(battleship_engine.GameListener):
+    '''
+    Records the shots of a game. start() is called once the layouts are set: it gives COM a fresh seed,
+    so its choices from then on only depend on what is recorded, along with the changes of strategy and the choices
+    that went over their time budget. Undone turns are dropped from the log
+    '''
+
+    def __init__(self):
+        self.log = None
+        self.offset = 0  # Recorded shots minus shots of the game
+
+    def start(self, game):
+        seed = game.rng.getrandbits(32)
+        game.rng.seed(seed)
+        self.resume(game, ReplayLog(game.board.size, game.fleet, seed, game.board.boats[USER],
+                                    game.board.boats[COM], strategy=game.strategy.name))
+
+    def resume(self, game, log):
+        # Goes on recording a log that already has the shots of the game so far
+        self.log = log
+        self.offset = len(log.shots) - game.shot_count
+        self.on_strategy_changed(game)
+
+    def on_shot(self, game, shot):
+        if self.log is not None:
+            if shot.overrun is not None:
+                self.log.overruns.append((len(self.log.shots), shot.overrun))
+            self.log.shots.append((shot.side, game.board.index(shot.row, shot.column)))
+
+    def on_undo(self, game, state):
+        if self.log is not None:
+            log = self.log
+            del log.shots[max(0, self.offset + game.shot_count):]
+            log.overruns = [overrun for overrun in log.overruns if overrun[0] < len(log.shots)]
+
+            # Undo does not change the strategy: changes made in the undone turns hold from now on
+            log.switches = [switch for switch in log.switches if switch[0] <= len(log.shots)]
+            self.on_strategy_changed(game)
+
+    def on_strategy_changed(self, game):
+        if self.log is not None and game.strategy.name != self.log.strategy_at(len(self.log.shots)):
+            self.log.switches.append((len(self.log.shots), game.strategy.name))
+
+
+# -------------------------------- REPLAY -------------------------------- #
+
+class Replay(object):
+    '''
+    Plays a log on a game (a new one by default, or one that already has the layouts of the log), one turn per step.
+    Listeners of the game receive USER's shots one by one and COM's turns as a whole, like in a real game.
+    With simulate, COM's turns are played by the engine again, with the recorded strategies and seed, and
+    ReplayMismatch is raised at the first shot that differs. Nothing is timed then: the choices that went over their
+    time budget are the recorded ones. It is exact under the Python version (and NumPy) that recorded the game
+    '''
+
+    def __init__(self, log, game=None, simulate=False):
+        if game is None:
+            game = battleship_engine.Game(log.size, log.fleet)
+            game.set_layout_masks(log.user_layout, log.com_layout)
+        game.strategy = battleship_strategies.make_strategy(log.strategy)
+        game.replayed_overruns = dict(log.overruns)
+        game.rng.seed(log.seed)
+
+        self.log = log
+        self.game = game
+        self.simulate = simulate
+        self.index = 0  # Next shot of the log
+
+        # Shots played again by the engine, when simulating
+        self.recorder = ReplayRecorder()
+        self.recorder.log = ReplayLog(log.size, log.fleet, log.seed, log.user_layout, log.com_layout,
+                                      strategy=log.strategy)
+
+    def done(self):
+        return self.index >= len(self.log.shots) or self.game.game_is_over()
+
+    def step(self):
+        '''
+        Plays the next shot of USER or the next turn of COM. Returns False once the log is over
+        '''
+        if self.done():
+            return False
+
+        strategy = self.log.strategy_at(self.index)
+        if strategy != self.game.strategy.name:
+            self.game.set_strategy(battleship_strategies.make_strategy(strategy))
+
+        if self.simulate:
+            self.step_simulated()
+        else:
+            self.step_recorded()
+
+        if self.done() and self.index < len(self.log.shots):
+            raise ReplayMismatch(self.index, self.log.shots[self.index], None)
+        return True
+
+    def run(self):
+        while self.step():
+            pass
+        return self.game
+
+    def step_recorded(self):
+        game = self.game
+        shots = self.log.shots
+        side, cell = shots[self.index]
+
+        if side == COM:
+            self.index += 1
+            game.fire(COM, cell)
+            if not game.game_is_over():
+                return
+
+        else:
+            # A turn of COM lasts until its first miss
+            turn = []
+            while self.index < len(shots) and shots[self.index][0] == USER:
+                turn.append(game.resolve(USER, shots[self.index][1], len(turn)))
+                self.index += 1
+                if not turn[-1].hit:
+                    break
+            game.notify_turn(turn)
+
+        if game.game_is_over():
+            game.end_game()
+
+    def step_simulated(self):
+        game = self.game
+        side, cell = self.log.shots[self.index]
+
+        game.subscribe(self.recorder)
+        try:
+            if side == COM:
+                game.user_fires(*game.board.position(cell))
+            else:
+                game.com_fires()
+        finally:
+            game.unsubscribe(self.recorder)
+
+        played = self.recorder.log.shots
+        for index in range(self.index, len(played)):
+            recorded = self.log.shots[index] if index < len(self.log.shots) else None
+            if played[index] != recorded:
+                raise ReplayMismatch(index, recorded, played[index])
+        self.index = len(played)
+
+
+def replay(log, game=None, simulate=False):
+    # Plays the whole log at once, and returns the game
+    return Replay(log, game, simulate).run()
+
+
+# -------------------------------- COMMAND LINE -------------------------------- #
+
+def summary(log, game):
+    winner = game.winner()
+    return ('{0}x{0} board | COM strategy: {1} | seed {2} | {3} shots ({4} bytes) | USER shots {5} | COM shots {6} | '
+            'winner: {7}').format(
+        log.size, log.strategy, log.seed, len(log.shots), len(log.to_bytes()),
+        sum(1 for side, cell in log.shots if side == COM), sum(1 for side, cell in log.shots if side == USER),
+        {COM: 'COM', USER: 'USER', None: 'none yet'}[winner])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replays a recorded battleship game headlessly')
+    parser.add_argument('replay', help='.bsr file written by the game')
+    parser.add_argument('--simulate', action='store_true',
+                        help="play COM's turns again and check that they match the recorded ones")
+    args = parser.parse_args()
+
+    log = ReplayLog.load(args.replay)
+    try:
+        game = replay(log, simulate=args.simulate)
+    except ReplayMismatch as mismatch:
+        print('MISMATCH: {}'.format(mismatch))
+        raise SystemExit(1)
+
+    print(summary(log, game))
+
+
+if __name__ == '__main__':
+    main()
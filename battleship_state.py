@@ -0,0 +1,130 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_state.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Compact saved state of a game (packed bitmasks), as text that can be kept in a knob of the script,
+       so an unfinished game can be resumed when the script is opened again
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import struct
+import base64
+import random
+import binascii
+
+import battleship_engine
+from battleship_engine import USER, COM
+from battleship_layouts import mask_bytes, mask_to_bytes, mask_from_bytes
+
+
+# -------------------------------- STATE FORMAT -------------------------------- #
+
+# Header: magic, version, board size, flags, color of the DAG before the game, boat lengths.
+# Then (length, count, count still looked for by COM) per boat length, the masks (boats of USER and COM,
+# revealed of USER and COM, discarded by COM), the state of COM's random generator (so COM goes on exactly as it
+# would have, and the replay stays exact) and the replay of the game so far
+MAGIC = b'BSST'
+VERSION = 2
+HEADER = struct.Struct('>4sBBBIB')
+FLEET_ENTRY = struct.Struct('>BHH')
+RNG_STATE = struct.Struct('>625I')
+COUNT = struct.Struct('>I')
+
+SHOW_USER_BOATS = 1  # Flag: the user sees all their boats
+
+
+class StateError(Exception):
+    pass
+
+
+class SavedGame(object):
+
+    def __init__(self, game, show_user_boats=False, dag_color=0, replay=b''):
+        self.game = game
+        self.show_user_boats = show_user_boats
+        self.dag_color = dag_color
+        self.replay = replay  # Bytes of the replay log, empty if the game is not recorded
+
+
+def dumps(saved):
+    '''
+    The saved game as ASCII text
+    '''
+    game = saved.game
+    board = game.board
+    n_bytes = mask_bytes(board.size)
+
+    lengths = sorted((int(boat_key.split('_')[0]), boat_key) for boat_key in game.fleet)
+    parts = [HEADER.pack(MAGIC, VERSION, board.size, SHOW_USER_BOATS if saved.show_user_boats else 0,
+                         saved.dag_color & 0xFFFFFFFF, len(lengths))]
+    parts.extend(FLEET_ENTRY.pack(length, game.fleet[boat_key], game.boats.get(boat_key, 0))
+                 for length, boat_key in lengths)
+    parts.extend(mask_to_bytes(mask, n_bytes) for mask in (board.boats[USER], board.boats[COM],
+                                                           board.revealed[USER], board.revealed[COM],
+                                                           board.discarded))
+    parts.append(RNG_STATE.pack(*game.rng.getstate()[1]))
+
+    parts.append(COUNT.pack(len(saved.replay)))
+    parts.append(saved.replay)
+
+    return base64.b64encode(b''.join(parts)).decode('ascii')
+
+
+def loads(text, strategy=None):
+    '''
+    SavedGame with a new game engine in the saved state
+    '''
+    try:
+        data = base64.b64decode(text)
+        magic, version, size, flags, dag_color, n_lengths = HEADER.unpack_from(data, 0)
+    except (TypeError, ValueError, binascii.Error, struct.error):
+        raise StateError('Not a saved battleship game')
+    if magic != MAGIC or version != VERSION:
+        raise StateError('Not a saved battleship game (or not of version {})'.format(VERSION))
+    offset = HEADER.size
+
+    fleet = {}
+    boats_left = {}
+    for _ in range(n_lengths):
+        length, count, left = FLEET_ENTRY.unpack_from(data, offset)
+        fleet['{}_boat'.format(length)] = count
+        boats_left['{}_boat'.format(length)] = left
+        offset += FLEET_ENTRY.size
+
+    n_bytes = mask_bytes(size)
+    masks = []
+    for _ in range(5):
+        masks.append(mask_from_bytes(data[offset:offset + n_bytes]))
+        offset += n_bytes
+    user_boats, com_boats, user_revealed, com_revealed, discarded = masks
+
+    rng = random.Random()
+    rng.setstate((rng.getstate()[0], RNG_STATE.unpack_from(data, offset), None))
+    offset += RNG_STATE.size
+
+    replay_size, = COUNT.unpack_from(data, offset)
+    offset += COUNT.size
+    replay = data[offset:offset + replay_size]
+
+    game = battleship_engine.Game(size, fleet, rng=rng, strategy=strategy)
+    boats = [0, 0]
+    boats[USER], boats[COM] = user_boats, com_boats
+    revealed = [0, 0]
+    revealed[USER], revealed[COM] = user_revealed, com_revealed
+    game.restore(boats, revealed, discarded, boats_left)
+
+    return SavedGame(game, bool(flags & SHOW_USER_BOATS), dag_color, replay)
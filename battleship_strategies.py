@@ -0,0 +1,89 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_strategies.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Strategies that COM can play with (see battleship_engine.Strategy), selectable by name:
+       'heuristic' (the default), 'parity' and 'density' (needs NumPy, COM uses the heuristic without it)
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import battleship_engine
+import battleship_density
+from battleship_engine import USER
+
+
+# -------------------------------- PARITY -------------------------------- #
+
+_parity_cache = {}
+
+
+def parity_mask(size, spacing):
+    '''
+    Coords whose row plus column is a multiple of the spacing: every boat at least that long covers one of them
+    '''
+    key = (size, spacing)
+    if key not in _parity_cache:
+        mask = 0
+        for row in range(size):
+            for column in range(size):
+                if (row + column) % spacing == 0:
+                    mask |= 1 << (row * size + column)
+        _parity_cache[key] = mask
+    return _parity_cache[key]
+
+
+class ParityStrategy(battleship_engine.Strategy):
+    '''
+    Follows its hits like the heuristic, but only hunts on a checkerboard whose spacing is the length
+    of the shortest boat still afloat, so no boat can hide between its shots
+    '''
+
+    name = 'parity'
+
+    def __init__(self, time_budget=0.01):
+        self.time_budget = time_budget  # Seconds per shot
+
+    def choose(self, game, last_hit, deadline=None):
+        target = game.follow_hits(last_hit)
+        if target is not None:
+            return target
+
+        lengths = [int(boat_key.split('_')[0]) for boat_key, count in game.boats.items() if count > 0]
+        spacing = min(lengths) if lengths else 1
+        if spacing < 2:
+            return None
+
+        board = game.board
+        cells = list(battleship_engine.iter_bits(parity_mask(board.size, spacing) & board.full
+                                                 & ~board.revealed[USER] & ~board.discarded))
+        return game.rng.choice(cells) if cells else None
+
+
+# -------------------------------- SELECTION -------------------------------- #
+
+STRATEGIES = ['heuristic', 'parity', 'density']
+
+
+def make_strategy(name):
+    '''
+    New strategy of the given name, the heuristic for unknown names
+    '''
+    if name == 'parity':
+        return ParityStrategy()
+    if name == 'density':
+        return battleship_density.DensityStrategy()
+    return battleship_engine.HEURISTIC
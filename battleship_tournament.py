@@ -0,0 +1,216 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: battleship_tournament.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Command line runner that plays headless games across a pool of processes to measure COM's strategies.
+       Example: python battleship_tournament.py --games 100000 --strategy density --processes 8
+       With --bank, the layouts are picked from a bank written by battleship_bank.py, mapped once by every worker
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import time
+import random
+import argparse
+import multiprocessing
+from collections import Counter
+
+import battleship_bank
+import battleship_engine
+import battleship_layouts
+import battleship_strategies
+from battleship_engine import USER, COM
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+# -------------------------------- SINGLE GAME -------------------------------- #
+
+def game_seeds(seed, index):
+    # Every game has its own seeds, so results do not depend on how games are spread across the workers
+    base = seed * 1000003 + index
+    return 2 * base, 2 * base + 1
+
+
+def set_layouts(game, layout=None, bank=None):
+    '''
+    USER layout (the one COM fires at) fixed by its own seed, or random. With a bank, both layouts come from it
+    '''
+    if layout is None:
+        game.set_board()
+    elif bank is not None:
+        game.set_layout_masks(bank.layout(random.Random(layout).randrange(len(bank))),
+                              bank.layout(game.rng.randrange(len(bank))))
+    else:
+        size, fleet = game.board.size, game.fleet
+        game.set_layout_masks(battleship_layouts.random_layout(size, fleet, random.Random(layout)),
+                              battleship_layouts.random_layout(size, fleet, game.rng))
+
+
+def play_game(seed, index, strategy, layout, user_player, latencies, size=10, bank=None):
+    '''
+    Plays one game and returns (winner, COM shots). The time of every COM turn is added to latencies (in microseconds)
+    '''
+    com_seed, user_seed = game_seeds(seed, index)
+    game = battleship_engine.Game(size, battleship_layouts.scaled_fleet(battleship_engine.boatDict, size),
+                                  rng=random.Random(com_seed), strategy=battleship_strategies.make_strategy(strategy),
+                                  bank=bank)
+
+    set_layouts(game, layout, bank)
+
+    # USER fires at random coords of COM. Without a USER player, COM fires until it wins
+    user_shots = list(range(game.board.cells))
+    random.Random(user_seed).shuffle(user_shots)
+
+    while not game.game_is_over():
+
+        if user_player == 'random':
+            if game.fire(COM, user_shots.pop()):
+                continue
+
+        start = timer()
+        game.com_fires()
+        latencies[int((timer() - start) * 1e6)] += 1
+
+    return game.winner(), battleship_engine.popcount(game.board.revealed[USER])
+
+
+def play_games(task):
+    '''
+    Worker entry point: plays a chunk of games and returns their aggregated results
+    '''
+    seed, first, last, strategy, layout, user_player, size, bank_path = task
+    bank = battleship_bank.open_bank(bank_path) if bank_path else None
+
+    shots_to_win = Counter()
+    latencies = Counter()
+    com_wins = 0
+
+    for index in range(first, last):
+        winner, com_shots = play_game(seed, index, strategy, layout, user_player, latencies, size, bank)
+        if winner == COM:
+            com_wins += 1
+            shots_to_win[com_shots] += 1
+
+    return last - first, com_wins, shots_to_win, latencies
+
+
+# -------------------------------- REPORT -------------------------------- #
+
+def percentile(histogram, fraction):
+    total = sum(histogram.values())
+    limit = fraction * total
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= limit:
+            return value
+    return None
+
+
+def report(strategy, games, com_wins, shots_to_win, latencies, elapsed, processes, size=10):
+    lines = ['',
+             'TOURNAMENT: {} games | {}x{} board | COM strategy: {} | {} processes | {:.1f}s ({:.0f} games/s)'
+             .format(games, size, size, strategy, processes, elapsed, games / max(elapsed, 1e-9)),
+             '-' * 90,
+             'COM win rate: {:.2f}%'.format(100.0 * com_wins / max(games, 1))]
+
+    if shots_to_win:
+        mean = sum(shots * count for shots, count in shots_to_win.items()) / float(com_wins)
+        lines.append('COM shots to win: mean {:.2f} | min {} | p10 {} | median {} | p90 {} | max {}'
+                     .format(mean, min(shots_to_win), percentile(shots_to_win, 0.1), percentile(shots_to_win, 0.5),
+                             percentile(shots_to_win, 0.9), max(shots_to_win)))
+
+        # Distribution of shots to win
+        top = max(shots_to_win.values())
+        for shots in range(min(shots_to_win), max(shots_to_win) + 1):
+            count = shots_to_win.get(shots, 0)
+            lines.append('  {:4d} | {:<50} {}'.format(shots, '#' * int(round(50.0 * count / top)), count))
+
+    if latencies:
+        turns = sum(latencies.values())
+        mean = sum(value * count for value, count in latencies.items()) / float(turns)
+        lines.append('COM turn latency (us): mean {:.1f} | median {} | p99 {} | max {} | {} turns'
+                     .format(mean, percentile(latencies, 0.5), percentile(latencies, 0.99), max(latencies), turns))
+
+    return '\n'.join(lines)
+
+
+# -------------------------------- RUNNER -------------------------------- #
+
+def run_tournament(games, strategy='heuristic', processes=None, seed=0, layout=None, user_player='random',
+                   chunk_size=250, size=10, bank_path=None):
+    processes = processes or multiprocessing.cpu_count()
+    tasks = [(seed, first, min(first + chunk_size, games), strategy, layout, user_player, size, bank_path)
+             for first in range(0, games, chunk_size)]
+
+    shots_to_win = Counter()
+    latencies = Counter()
+    com_wins = 0
+
+    start = time.time()
+    pool = multiprocessing.Pool(processes) if processes != 1 else None
+    try:
+        results = map(play_games, tasks) if pool is None else pool.imap_unordered(play_games, tasks)
+        for played, chunk_wins, chunk_shots, chunk_latencies in results:
+            com_wins += chunk_wins
+            shots_to_win.update(chunk_shots)
+            latencies.update(chunk_latencies)
+
+        if pool is not None:
+            pool.close()
+            pool.join()
+    finally:
+        # The workers are stopped when one of them raises (nothing left to stop otherwise)
+        if pool is not None:
+            pool.terminate()
+
+    return report(strategy, games, com_wins, shots_to_win, latencies, time.time() - start, processes, size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays headless battleship games to measure COM strategies')
+    parser.add_argument('--games', type=int, default=10000, help='number of games to play')
+    parser.add_argument('--strategy', choices=battleship_strategies.STRATEGIES, default='heuristic',
+                        help='COM strategy')
+    parser.add_argument('--processes', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--seed', type=int, default=0, help='base seed, every game derives its own from it')
+    parser.add_argument('--layout', type=int, default=None,
+                        help='seed of a fixed USER layout, the same for every game (default: random layouts). '
+                             'With --bank, it picks the layout from the bank')
+    parser.add_argument('--user', choices=['random', 'none'], default='random',
+                        help="USER player: random shots, or none so COM always plays until it wins")
+    parser.add_argument('--size', type=int, default=10,
+                        help='squares on the board side, the 10x10 fleet is scaled to the area of the board')
+    parser.add_argument('--bank', default=None,
+                        help='layout bank written by battleship_bank.py for this size (default: generated layouts)')
+    args = parser.parse_args()
+
+    if args.bank:
+        try:
+            bank = battleship_bank.LayoutBank(args.bank)
+        except (IOError, OSError, battleship_bank.BankError) as error:
+            parser.error(str(error))
+        if not bank.matches(args.size, battleship_layouts.scaled_fleet(battleship_engine.boatDict, args.size)):
+            parser.error('the layout bank is not of a {0}x{0} board'.format(args.size))
+        bank.close()
+
+    print(run_tournament(args.games, args.strategy, args.processes, args.seed, args.layout, args.user,
+                         size=args.size, bank_path=args.bank))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: benchmarks/bench_engine.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Times the headless engine against the size of the board: layout generation, and the cost of every COM turn
+       and every COM shot, for games where COM fires until it wins.
+       Example: python benchmarks/bench_engine.py --sizes 10 20 30 50 100
+       With --bank, the sizes that have a layout bank (written by battleship_bank.py) pick their layouts from it
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import battleship_bank
+import battleship_engine
+import battleship_layouts
+import battleship_strategies
+from battleship_engine import USER
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+# -------------------------------- MEASURES -------------------------------- #
+
+def bench_size(size, games, strategy, seed, banks=()):
+    '''
+    Returns (fleet, layout ms, turn us, shot us, shots per game) averaged over the given number of games
+    '''
+    fleet = battleship_layouts.scaled_fleet(battleship_engine.boatDict, size)
+    bank = next((bank for bank in banks if bank.matches(size, fleet)), None)
+
+    layout_time = 0.0
+    turn_time = 0.0
+    turns = 0
+    shots = 0
+
+    for index in range(games):
+        game = battleship_engine.Game(size, fleet, rng=random.Random(seed * 1000003 + index),
+                                      strategy=battleship_strategies.make_strategy(strategy), bank=bank)
+
+        start = timer()
+        game.set_board()
+        layout_time += timer() - start
+
+        while not game.game_is_over():
+            start = timer()
+            game.com_fires()
+            turn_time += timer() - start
+            turns += 1
+
+        shots += battleship_engine.popcount(game.board.revealed[USER])
+
+    return (fleet, 1000 * layout_time / games, 1e6 * turn_time / turns, 1e6 * turn_time / shots,
+            float(shots) / games)
+
+
+# -------------------------------- REPORT -------------------------------- #
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the battleship engine for several board sizes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 30, 50, 100], help='squares on the side')
+    parser.add_argument('--games', type=int, default=20, help='games per size')
+    parser.add_argument('--strategy', choices=battleship_strategies.STRATEGIES, default='heuristic',
+                        help='COM strategy')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the layouts and of COM')
+    parser.add_argument('--bank', nargs='*', default=[], help='layout banks to pick the layouts of their sizes from')
+    args = parser.parse_args()
+
+    banks = [battleship_bank.open_bank(path) for path in args.bank]
+
+    print('')
+    print('COM strategy: {} | {} games per size'.format(args.strategy, args.games))
+    print('{:>8}{:>8}{:>14}{:>14}{:>14}{:>14}'.format('size', 'boats', 'layout (ms)', 'turn (us)', 'shot (us)',
+                                                      'shots/game'))
+    print('-' * 72)
+
+    for size in args.sizes:
+        fleet, layout_ms, turn_us, shot_us, game_shots = bench_size(size, args.games, args.strategy, args.seed, banks)
+        print('{:>8}{:>8}{:>14.2f}{:>14.1f}{:>14.1f}{:>14.1f}'.format('{0}x{0}'.format(size), sum(fleet.values()),
+                                                                      layout_ms, turn_us, shot_us, game_shots))
+
+
+if __name__ == '__main__':
+    main()
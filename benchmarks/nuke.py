@@ -0,0 +1,441 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: benchmarks/nuke.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Stand-in for the nuke module, so the game can be timed outside Nuke. It keeps the nodes in memory and
+       counts every call made to its API (node creations, knob sets and reads, deletions...)
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import json
+import threading
+from collections import Counter, OrderedDict
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+# -------------------------------- RECORDING -------------------------------- #
+
+calls = Counter()  # API calls by name
+
+_nodes = OrderedDict()  # Node name -> node, in creation order
+_knob_changed_callbacks = []
+
+_main_thread = threading.current_thread()
+_main_thread_calls = queue.Queue()  # Calls sent to the main thread by other threads
+
+ask_answer = False  # What nuke.ask() returns
+
+
+def reset():
+    calls.clear()
+    _nodes.clear()
+    del _knob_changed_callbacks[:]
+    _root.__init__('Root', name='root')
+    _preferences.__init__('Preferences', name='preferences', DAGBackColor=0)
+
+
+# -------------------------------- KNOBS -------------------------------- #
+
+class Knob(object):
+
+    def __init__(self, name, label='', value=None):
+        self._name = name
+        self._label = label
+        self._value = value
+        self._enabled = True
+        self._flags = 0
+        self._tooltip = ''
+        self.node = None
+
+    def name(self):
+        return self._name
+
+    def setName(self, name):
+        self._name = name
+
+    def label(self):
+        return self._label
+
+    def setLabel(self, label):
+        self._label = label
+
+    def value(self):
+        calls['knob.value'] += 1
+        return self._value
+
+    def getValue(self):
+        return self.value()
+
+    def setValue(self, value):
+        calls['knob.setValue'] += 1
+
+        # Renaming: empty names are ignored, names in use get a number
+        if self._name == 'name' and self.node is not None:
+            if not value or _nodes.get(self._value) is not self.node:
+                return
+            del _nodes[self._value]
+            value = _unique_name(self.node.Class(), value)
+            _nodes[value] = self.node
+
+        self._value = value
+
+        if self.node is not None and self._name not in ('name', 'selected'):
+            for callback, args, kwargs, node_class in list(_knob_changed_callbacks):
+                if node_class in (None, self.node.Class()):
+                    _this[:] = [self.node, self]
+                    callback(*args, **kwargs)
+                    _this[:] = []
+
+    def setFlag(self, flag):
+        self._flags |= flag
+
+    def clearFlag(self, flag):
+        self._flags &= ~flag
+
+    def setTooltip(self, tooltip):
+        self._tooltip = tooltip
+
+    def tooltip(self):
+        return self._tooltip
+
+    def setEnabled(self, enabled):
+        self._enabled = enabled
+
+    def enabled(self):
+        return self._enabled
+
+
+class PyScript_Knob(Knob):
+
+    def __init__(self, name, label='', command=''):
+        Knob.__init__(self, name, label, command)
+
+
+class Text_Knob(Knob):
+
+    def __init__(self, name, label='', text=''):
+        Knob.__init__(self, name, label, text)
+
+
+class String_Knob(Knob):
+
+    def __init__(self, name, label='', value=''):
+        Knob.__init__(self, name, label, value)
+
+
+class Multiline_Eval_String_Knob(String_Knob):
+    pass
+
+
+class Enumeration_Knob(Knob):
+
+    def __init__(self, name, label='', items=()):
+        Knob.__init__(self, name, label, items[0] if items else '')
+        self._items = list(items)
+
+    def values(self):
+        return list(self._items)
+
+
+class Tab_Knob(Knob):
+    pass
+
+
+class Int_Knob(Knob):
+
+    def __init__(self, name, label=''):
+        Knob.__init__(self, name, label, 0)
+
+
+# Knob flags
+INVISIBLE = 0x400
+READ_ONLY = 0x10000000
+NO_ANIMATION = 0x100
+
+
+# -------------------------------- NODES -------------------------------- #
+
+# Knobs that every node has, created when they are first used
+DEFAULT_KNOBS = {'name': '', 'label': '', 'knobChanged': '', 'xpos': 0, 'ypos': 0, 'tile_color': 0,
+                 'hide_input': False, 'disable': False, 'note_font_size': 0, 'onScriptLoad': ''}
+
+
+class Node(object):
+
+    def __init__(self, node_class, **knobs):
+        self._class = node_class
+        self._knobs = {}
+        self._selected = False
+
+        self._add(Knob('name', value=''))
+        for name, value in knobs.items():
+            if name not in self._knobs:
+                self._add(Knob(name))
+            self._knobs[name]._value = value
+
+    def _add(self, knob):
+        knob.node = self
+        self._knobs[knob.name()] = knob
+
+    def __getitem__(self, name):
+        if name not in self._knobs:
+            if name == 'User':
+                self._add(Tab_Knob('User'))
+            elif name in DEFAULT_KNOBS:
+                self._add(Knob(name, value=DEFAULT_KNOBS[name]))
+            else:
+                raise NameError('knob {} does not exist'.format(name))
+        return self._knobs[name]
+
+    def knob(self, name):
+        try:
+            return self[name]
+        except NameError:
+            return None
+
+    def knobs(self):
+        return dict(self._knobs)
+
+    def addKnob(self, knob):
+        calls['addKnob'] += 1
+        self._add(knob)
+
+    def Class(self):
+        return self._class
+
+    def name(self):
+        return self._knobs['name']._value
+
+    def setName(self, name):
+        self._knobs['name']._value = name
+
+    def xpos(self):
+        return self['xpos']._value
+
+    def ypos(self):
+        return self['ypos']._value
+
+    def setXYpos(self, x, y):
+        self['xpos'].setValue(x)
+        self['ypos'].setValue(y)
+
+    def setSelected(self, selected):
+        calls['setSelected'] += 1
+        self._selected = selected
+
+    def isSelected(self):
+        return self._selected
+
+
+def _unique_name(node_class, name):
+    if not name:
+        name = node_class
+    if name not in _nodes:
+        return name
+
+    # Like Nuke, a number is added to a name that is already in use
+    number = 1
+    while name + str(number) in _nodes:
+        number += 1
+    return name + str(number)
+
+
+def _register(node):
+    node.setName(_unique_name(node.Class(), node.name()))
+    _nodes[node.name()] = node
+    return node
+
+
+class _NodeConstructors(object):
+
+    def __getattr__(self, node_class):
+        def create(**knobs):
+            calls['create'] += 1
+            return _register(Node(node_class, **knobs))
+
+        return create
+
+
+nodes = _NodeConstructors()
+
+_root = Node('Root', name='root')
+_preferences = Node('Preferences', name='preferences', DAGBackColor=0)
+
+
+# -------------------------------- SCRIPT -------------------------------- #
+
+def root():
+    return _root
+
+
+def toNode(name):
+    calls['toNode'] += 1
+    if name == 'preferences':
+        return _preferences
+    if name == 'root':
+        return _root
+    return _nodes.get(name)
+
+
+def allNodes(filter=None):
+    calls['allNodes'] += 1
+    return [node for node in _nodes.values() if filter is None or node.Class() == filter]
+
+
+def selectedNodes():
+    calls['selectedNodes'] += 1
+    return [node for node in _nodes.values() if node._selected]
+
+
+def selectedNode():
+    selected = selectedNodes()
+    if not selected:
+        raise ValueError('no node selected')
+    return selected[-1]
+
+
+def delete(node):
+    calls['delete'] += 1
+    _nodes.pop(node.name(), None)
+
+
+def nodeCopy(path):
+    calls['nodeCopy'] += 1
+    with open(path, 'w') as copy_file:
+        for node in selectedNodes():
+            knobs = dict((name, knob._value) for name, knob in node._knobs.items()
+                         if type(knob) is Knob and knob._value is not None)
+            copy_file.write(json.dumps([node.Class(), knobs]) + '\n')
+
+
+def nodePaste(path):
+    calls['nodePaste'] += 1
+    last = None
+    with open(path) as paste_file:
+        for line in paste_file:
+            node_class, knobs = json.loads(line)
+            last = _register(Node(node_class, **knobs))
+            last._selected = True
+    return last
+
+
+# -------------------------------- CALLBACKS -------------------------------- #
+
+_this = []
+
+
+def addKnobChanged(callback, args=(), kwargs={}, nodeClass=None):
+    calls['addKnobChanged'] += 1
+    _knob_changed_callbacks.append((callback, args, kwargs, nodeClass))
+
+
+def removeKnobChanged(callback, args=(), kwargs={}, nodeClass=None):
+    calls['removeKnobChanged'] += 1
+    # Like Nuke, callbacks that were never added are ignored
+    if (callback, args, kwargs, nodeClass) in _knob_changed_callbacks:
+        _knob_changed_callbacks.remove((callback, args, kwargs, nodeClass))
+
+
+def thisNode():
+    return _this[0] if _this else None
+
+
+def thisKnob():
+    return _this[1] if _this else None
+
+
+def executeInMainThread(call, args=(), kwargs={}):
+    # Calls from other threads wait in a queue until process_events() runs them, like Nuke's event loop does
+    calls['executeInMainThread'] += 1
+    if threading.current_thread() is _main_thread:
+        call(*args, **kwargs)
+    else:
+        _main_thread_calls.put((call, args, kwargs))
+
+
+def process_events(timeout=0.0):
+    '''
+    Runs the calls that other threads have sent to the main thread, waiting up to timeout for the first one
+    '''
+    try:
+        call, args, kwargs = _main_thread_calls.get(timeout=timeout) if timeout else _main_thread_calls.get_nowait()
+    except queue.Empty:
+        return
+
+    while True:
+        call(*args, **kwargs)
+        try:
+            call, args, kwargs = _main_thread_calls.get_nowait()
+        except queue.Empty:
+            return
+
+
+def executeInMainThreadWithResult(call, args=(), kwargs={}):
+    calls['executeInMainThread'] += 1
+    return call(*args, **kwargs)
+
+
+# -------------------------------- INTERFACE -------------------------------- #
+
+def message(text):
+    calls['message'] += 1
+
+
+def ask(text):
+    calls['ask'] += 1
+    return ask_answer
+
+
+def tprint(*text):
+    calls['tprint'] += 1
+
+
+def show(node):
+    calls['show'] += 1
+
+
+def zoomToFitSelected():
+    calls['zoomToFitSelected'] += 1
+
+
+def zoom(*args):
+    calls['zoom'] += 1
+    return 1.0
+
+
+def center():
+    calls['center'] += 1
+    return [0.0, 0.0]
+
+
+class ProgressTask(object):
+
+    def __init__(self, title):
+        calls['ProgressTask'] += 1
+
+    def setMessage(self, text):
+        pass
+
+    def setProgress(self, progress):
+        pass
+
+    def isCancelled(self):
+        return False
@@ -0,0 +1,210 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: benchmarks/run_benchmarks.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Times the phases of battleship_exec.py against the stand-in nuke module of this folder, for several board
+       sizes, and reports their wall time and the calls they make to the Nuke API.
+       Example: python benchmarks/run_benchmarks.py --sizes 6 8 10
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import os
+import re
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import traceback
+
+BENCHMARKS_FOLDER = os.path.dirname(os.path.abspath(__file__))
+REPO_FOLDER = os.path.dirname(BENCHMARKS_FOLDER)
+EXEC_FILE = os.path.join(REPO_FOLDER, 'battleship_exec.py')
+
+# The stand-in nuke module of this folder is found before any other one
+sys.path.insert(0, REPO_FOLDER)
+sys.path.insert(0, BENCHMARKS_FOLDER)
+
+import nuke
+
+timer = getattr(time, 'perf_counter', time.time)
+
+GAMEPLAY_MARKER = '# -------------------------------- GAMEPLAY -------------------------------- #'
+COUNTED_CALLS = ['create', 'knob.setValue', 'knob.value', 'delete']
+
+
+# -------------------------------- PHASES -------------------------------- #
+
+class PhaseRecorder(object):
+    '''
+    Accumulates wall time and Nuke API calls per phase. Time and calls of nested phases are only counted
+    in the innermost one
+    '''
+
+    def __init__(self):
+        self.phases = []  # (name, seconds, calls)
+        self.stack = []
+
+    def run(self, name, function, *args, **kwargs):
+        # Phases are listed in the order they start
+        slot = len(self.phases)
+        self.phases.append(None)
+
+        self.stack.append([0.0, {}])
+        calls_before = dict(nuke.calls)
+        start = timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = timer() - start
+            nested_time, nested_calls = self.stack.pop()
+
+            calls = {}
+            for call, count in nuke.calls.items():
+                calls[call] = count - calls_before.get(call, 0) - nested_calls.get(call, 0)
+            self.phases[slot] = (name, elapsed - nested_time, calls)
+
+            # The parent phase will not count this one again
+            if self.stack:
+                parent_time, parent_calls = self.stack[-1]
+                self.stack[-1][0] = parent_time + elapsed
+                for call, count in nuke.calls.items():
+                    parent_calls[call] = parent_calls.get(call, 0) + count - calls_before.get(call, 0)
+
+    def wrap(self, namespace, function_name, phase_name=None, before=None):
+        function = namespace[function_name]
+
+        def wrapper(*args, **kwargs):
+            if before is not None:
+                before()
+            return self.run(phase_name or function_name, function, *args, **kwargs)
+
+        namespace[function_name] = wrapper
+
+
+# -------------------------------- SCRIPT LOADING -------------------------------- #
+
+def load_script(square_number):
+    '''
+    Source of battleship_exec.py for the given board size, split into its definitions and its gameplay
+    '''
+    with open(EXEC_FILE) as exec_file:
+        source = exec_file.read()
+
+    source = re.sub(r'(?m)^squareNumber = \d+', 'squareNumber = {}'.format(square_number), source)
+    definitions, gameplay = source.split(GAMEPLAY_MARKER, 1)
+    return (compile(definitions, EXEC_FILE, 'exec'),
+            compile('\n' * definitions.count('\n') + gameplay, EXEC_FILE, 'exec'))
+
+
+def start_game(recorder, square_number, cache_folder, seed):
+    '''
+    Runs the script as Nuke would (board, coords, layouts...) and returns its namespace
+    '''
+    definitions, gameplay = load_script(square_number)
+
+    nuke.reset()
+    random.seed(seed)
+    namespace = {'__file__': EXEC_FILE, '__name__': 'battleship_exec'}
+    exec(definitions, namespace)
+
+    # Everything the game writes stays in the temporary folder
+    namespace['templateCache'] = cache_folder
+    namespace['replayFolder'] = cache_folder
+    namespace['profileFolder'] = cache_folder
+
+    def seed_game():
+        namespace['game'].rng.seed(seed)
+
+    recorder.wrap(namespace, 'board_creation')
+    recorder.wrap(namespace, 'coord_objects_creation')
+    recorder.wrap(namespace, 'set_board', before=seed_game)
+    recorder.wrap(namespace, 'reveal_all')
+    recorder.wrap(namespace, 'end_game')
+
+    exec(gameplay, namespace)
+    return namespace
+
+
+def bench_size(square_number, seed):
+    cache_folder = tempfile.mkdtemp(prefix='bShip_bench_')
+    recorder = PhaseRecorder()
+
+    try:
+        # First game: the board template does not exist yet. COM plays until the game is over
+        cold = PhaseRecorder()
+        namespace = start_game(cold, square_number, cache_folder, seed)
+        game = namespace['game']
+
+        def com_game():
+            while not game.game_is_over():
+                game.com_fires()
+
+        cold.run('com_fires (full game)', com_game)
+        recorder.phases.extend([(name + (' (cold)' if name == 'board_creation' else ''), seconds, calls)
+                                for name, seconds, calls in cold.phases])
+
+        # Second game: the board template is pasted, then everything is revealed and the game is closed
+        warm = PhaseRecorder()
+        namespace = start_game(warm, square_number, cache_folder, seed)
+        namespace['reveal_all']()
+        namespace['end_game']()
+        recorder.phases.extend([(name + ' (warm)', seconds, calls) for name, seconds, calls in warm.phases
+                                if name == 'board_creation'])
+        recorder.phases.extend([(name, seconds, calls) for name, seconds, calls in warm.phases
+                                if name in ('reveal_all', 'end_game')])
+
+    finally:
+        shutil.rmtree(cache_folder, ignore_errors=True)
+
+    return recorder.phases
+
+
+# -------------------------------- REPORT -------------------------------- #
+
+def report(square_number, phases):
+    lines = ['',
+             'squareNumber = {}'.format(square_number),
+             '{:<26}{:>12}{:>10}{:>11}{:>12}{:>10}{:>13}'.format('phase', 'wall (ms)', 'created', 'knob sets',
+                                                                 'knob reads', 'deleted', 'other calls'),
+             '-' * 94]
+
+    for name, seconds, calls in phases:
+        other_calls = sum(count for call, count in calls.items() if call not in COUNTED_CALLS)
+        lines.append('{:<26}{:>12.2f}{:>10}{:>11}{:>12}{:>10}{:>13}'.format(name, seconds * 1000,
+                                                                            *[calls.get(call, 0)
+                                                                              for call in COUNTED_CALLS]
+                                                                            + [other_calls]))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the phases of the battleship game with a stand-in nuke')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[6, 8, 10], help='values of squareNumber')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the layouts and of COM')
+    args = parser.parse_args()
+
+    for square_number in args.sizes:
+        try:
+            print(report(square_number, bench_size(square_number, args.seed)))
+        except Exception:
+            print('\nsquareNumber = {}\nFAILED:\n{}'.format(square_number, traceback.format_exc()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/helpers.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Seeded headless games for the tests: USER fires at random, and can switch COM's strategy, undo turns and
+       let COM play its turns on a copy of the game (as the worker thread of the Nuke script does)
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import battleship_engine
+import battleship_layouts
+import battleship_replay
+import battleship_strategies
+from battleship_engine import USER, COM
+
+STRATEGIES = battleship_strategies.STRATEGIES
+
+
+def new_game(seed, size=10, strategy='heuristic', bank=None):
+    game = battleship_engine.Game(size, battleship_layouts.scaled_fleet(battleship_engine.boatDict, size),
+                                  rng=random.Random(seed), strategy=make_strategy(strategy), bank=bank)
+    game.set_board()
+    return game
+
+
+def make_strategy(name, tight_budget=False):
+    # tight_budget makes the density strategy go over its time budget all the time
+    strategy = battleship_strategies.make_strategy(name)
+    if tight_budget and name == 'density':
+        strategy.time_budget = 1e-6
+    return strategy
+
+
+def user_turn(game, rng, threaded=False):
+    '''
+    One random shot of USER, and COM's turn after a miss (played on a copy of the game when threaded)
+    '''
+    cells = [cell for cell in range(game.board.cells) if not game.board.revealed[COM] >> cell & 1]
+    row, column = game.board.position(rng.choice(cells))
+
+    if not threaded:
+        return game.user_fires(row, column)
+
+    hit = game.user_fires(row, column, com_turn=False)
+    if not hit and not game.game_is_over():
+        engine = game.copy()
+        shots = engine.com_fires()
+        game.apply_turn(shots[:3])
+        game.apply_turn(shots[3:], engine.rng.getstate(), engine.strategy)
+    return hit
+
+
+def play_recorded(seed, size=10, strategy='heuristic', switches=0.0, undos=0.0, threaded=False, tight_budget=False,
+                  shots=None):
+    '''
+    Plays a game to its end (or for the given number of USER shots) with a replay recorder, and returns
+    (game, recorder). switches and undos are the chances of switching strategy and undoing before every shot
+    '''
+    rng = random.Random(seed)
+    game = new_game(seed, size, strategy)
+    game.strategy = make_strategy(strategy, tight_budget)
+    recorder = battleship_replay.ReplayRecorder()
+    recorder.start(game)
+    game.subscribe(recorder)
+
+    played = 0
+    while not game.game_is_over() and (shots is None or played < shots):
+        if rng.random() < switches:
+            game.set_strategy(make_strategy(rng.choice(STRATEGIES), tight_budget))
+        if rng.random() < undos and game.can_undo():
+            game.undo()
+            continue
+
+        user_turn(game, rng, threaded and rng.random() < 0.5)
+        played += 1
+
+    return game, recorder
+
+
+def unhit_boats(game):
+    # Coords of USER's boats that COM has not hit yet
+    return game.board.boats[USER] & ~game.board.revealed[USER]
@@ -0,0 +1,98 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_bank.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Layout banks: the layouts written are valid and different, and games pick theirs from the bank
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import helpers
+
+import battleship_bank
+import battleship_engine
+import battleship_layouts
+from battleship_engine import USER, COM
+
+
+class LayoutBankTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='bShip_tests_')
+        self.path = os.path.join(self.folder, 'layouts.bslb')
+        self.fleet = battleship_layouts.scaled_fleet(battleship_engine.boatDict, 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_round_trip(self):
+        written = battleship_bank.build(self.path, 10, self.fleet, 500, random.Random(1))
+        bank = battleship_bank.LayoutBank(self.path)
+        try:
+            self.assertEqual(len(bank), written)
+            self.assertTrue(bank.matches(10, self.fleet))
+
+            lengths = battleship_layouts.fleet_lengths(self.fleet)
+            board = battleship_engine.Board(10)
+            layouts = set()
+            for index in range(len(bank)):
+                ships = bank.ships(index)
+                layout = bank.layout(index)
+
+                # Valid: the lengths of the fleet, and boats that never touch
+                self.assertEqual([battleship_engine.popcount(ship) for ship in ships], lengths)
+                self.assertEqual(sorted(board.split_ships(layout)), sorted(ships))
+                layouts.add(layout)
+
+            self.assertEqual(len(layouts), len(bank))
+        finally:
+            bank.close()
+
+    def test_games_pick_from_the_bank(self):
+        battleship_bank.build(self.path, 10, self.fleet, 50, random.Random(2))
+        bank = battleship_bank.LayoutBank(self.path)
+        try:
+            layouts = set(bank.layout(index) for index in range(len(bank)))
+            for seed in range(20):
+                game = helpers.new_game(seed, bank=bank)
+                self.assertIn(game.board.boats[USER], layouts)
+                self.assertIn(game.board.boats[COM], layouts)
+                self.assertNotEqual(game.board.boats[USER], game.board.boats[COM])
+
+            self.assertRaises(ValueError, battleship_engine.Game, 12, None, bank=bank)
+        finally:
+            bank.close()
+
+    def test_small_boards(self):
+        # Few layouts: the build stops once it finds no new one
+        fleet = battleship_layouts.scaled_fleet(battleship_engine.boatDict, 2)
+        written = battleship_bank.build(self.path, 2, fleet, 1000, random.Random(0), max_misses=200)
+        self.assertEqual(written, 4)
+
+    def test_not_a_bank(self):
+        with open(self.path, 'wb') as bank_file:
+            bank_file.write(b'BSHP' + b'\0' * 20)
+        self.assertRaises(battleship_bank.BankError, battleship_bank.LayoutBank, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_discards.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: COM's incremental discards: no coord of an unhit boat is ever discarded, and the candidates are the coords
+       neither revealed nor discarded
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import random
+import unittest
+
+import helpers
+
+import battleship_engine
+from battleship_engine import USER
+
+
+class DiscardTest(unittest.TestCase):
+
+    def test_no_unhit_boat_is_discarded(self):
+        for seed in range(30):
+            for size in (6, 10, 15):
+                game = helpers.new_game(seed, size, helpers.STRATEGIES[seed % 3])
+                rng = random.Random(seed)
+                while not game.game_is_over():
+                    helpers.user_turn(game, rng)
+                    self.assertEqual(game.board.discarded & helpers.unhit_boats(game), 0)
+
+    def test_candidates(self):
+        game = helpers.new_game(3)
+        rng = random.Random(3)
+        while not game.game_is_over():
+            helpers.user_turn(game, rng)
+            free = game.board.full & ~game.board.revealed[USER] & ~game.board.discarded
+            self.assertEqual(game.candidates.count, battleship_engine.popcount(free))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_engine.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: The headless engine plays whole games without Nuke: the same seed plays the same game, and listeners are
+       told of every shot and of the end of the game once
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import random
+import unittest
+
+import helpers
+
+import battleship_engine
+from battleship_engine import USER, COM
+
+
+class Recorder(battleship_engine.GameListener):
+
+    def __init__(self):
+        self.shots = []
+        self.winners = []
+
+    def on_shot(self, game, shot):
+        self.shots.append(shot)
+
+    def on_game_over(self, game, winner):
+        self.winners.append(winner)
+
+
+class HeadlessGameTest(unittest.TestCase):
+
+    def test_same_seed_same_game(self):
+        for seed in range(10):
+            games = [helpers.new_game(seed, strategy=helpers.STRATEGIES[seed % 3]) for _ in range(2)]
+            for game in games:
+                rng = random.Random(seed)
+                while not game.game_is_over():
+                    helpers.user_turn(game, rng)
+
+            self.assertEqual(games[0].board.state(), games[1].board.state())
+            self.assertEqual(games[0].winner(), games[1].winner())
+
+    def test_listeners(self):
+        for seed in range(10):
+            game = helpers.new_game(seed)
+            recorder = Recorder()
+            game.subscribe(recorder)
+            rng = random.Random(seed)
+            while not game.game_is_over():
+                helpers.user_turn(game, rng)
+
+            self.assertEqual(recorder.winners, [game.winner()])
+            self.assertEqual(len(recorder.shots), battleship_engine.popcount(game.board.revealed[USER]) +
+                             battleship_engine.popcount(game.board.revealed[COM]))
+            for shot in recorder.shots:
+                # A shot at a side is a hit exactly when that side has a boat there
+                self.assertEqual(shot.hit,
+                                 bool(game.board.boats[shot.side] >> game.board.index(shot.row, shot.column) & 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
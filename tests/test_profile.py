@@ -0,0 +1,74 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_profile.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Profiling of the phases: nested phases are not counted twice, and the summary gives the time and the Nuke
+       API calls of the same last calls
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import unittest
+
+import helpers
+
+import battleship_profile
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_nested_phases(self):
+        profiler = battleship_profile.Profiler()
+        profiler.start('turn')
+        profiler.count('toNode')
+        profiler.start('render')
+        profiler.count('knob.setValue', 5)
+        profiler.stop()
+        profiler.stop()
+
+        self.assertEqual(profiler.phases['turn'].calls, {'toNode': 1})
+        self.assertEqual(profiler.phases['render'].calls, {'knob.setValue': 5})
+
+    def test_summary_of_the_last_calls(self):
+        profiler = battleship_profile.Profiler(window=2)
+        for calls in (100, 1, 3):
+            profiler.start('render')
+            profiler.count('knob.setValue', calls)
+            profiler.stop()
+
+        # The first call is out of the window: (1 + 3) / 2 calls, not (100 + 1 + 3) / 3
+        self.assertIn('| 2 Nuke calls (last 2)', profiler.summary())
+        self.assertEqual(profiler.to_dict()['phases'][0]['recent_mean_calls'], 2.0)
+
+    def test_instrumented_game(self):
+        profiler = battleship_profile.Profiler()
+        game = helpers.new_game(0)
+        profiler.instrument(game, 'com_fires')
+        turns = 0
+        while not game.game_is_over():
+            game.com_fires()
+            turns += 1
+
+        self.assertEqual(profiler.phases['com_fires'].count, turns)
+        self.assertTrue(game.game_is_over())
+
+    def test_disabled(self):
+        profiler = battleship_profile.Profiler(enabled=False)
+        self.assertIs(profiler.timed('render', len), len)
+
+
+if __name__ == '__main__':
+    unittest.main()
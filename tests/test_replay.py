@@ -0,0 +1,127 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_replay.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Replay logs go through their binary format unchanged (also the logs of version 1), replays follow the
+       recorded shots, and simulated replays play COM's turns again exactly: with every strategy, changes of
+       strategy, choices over their time budget, undone turns and turns played on a copy of the game
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import unittest
+
+import helpers
+
+import battleship_layouts
+import battleship_replay
+from battleship_engine import USER, COM
+
+
+class ReplayLogTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for seed in range(20):
+            game, recorder = helpers.play_recorded(seed, strategy=helpers.STRATEGIES[seed % 3], switches=0.2,
+                                                   undos=0.1, tight_budget=seed % 2 == 1)
+            data = recorder.log.to_bytes()
+            log = battleship_replay.ReplayLog.from_bytes(data)
+
+            self.assertEqual(log.to_bytes(), data)
+            self.assertEqual((log.shots, log.switches, log.overruns, log.strategy),
+                             (recorder.log.shots, recorder.log.switches, recorder.log.overruns,
+                              recorder.log.strategy))
+
+    def test_version_1(self):
+        # Logs written before the strategy was recorded are heuristic games
+        log = battleship_replay.ReplayLog(10, {'2_boat': 1}, 5, 3, 12, [(COM, 1), (USER, 2)], 'parity',
+                                          [(1, 'density')], [(1, True)])
+        data = log.to_bytes()
+        fleet_end = battleship_replay.HEADER.size + battleship_replay.FLEET_ENTRY.size
+        layouts = 2 * battleship_layouts.mask_bytes(10)
+        old = (data[:4] + b'\x01' + data[5:fleet_end] + data[fleet_end + 7:fleet_end + 7 + layouts] +
+               data[-4:])
+
+        old_log = battleship_replay.ReplayLog.from_bytes(old)
+        self.assertEqual(old_log.strategy, 'heuristic')
+        self.assertEqual((old_log.user_layout, old_log.com_layout, old_log.shots), (3, 12, log.shots))
+        self.assertEqual((old_log.switches, old_log.overruns), ([], []))
+
+    def test_not_a_replay(self):
+        self.assertRaises(battleship_replay.ReplayError, battleship_replay.ReplayLog.from_bytes, b'BSST' + b'\0' * 20)
+
+
+class ReplayTest(unittest.TestCase):
+
+    def check_replays(self, game, log):
+        for simulate in (False, True):
+            replayed = battleship_replay.replay(battleship_replay.ReplayLog.from_bytes(log.to_bytes()),
+                                                simulate=simulate)
+            self.assertEqual(replayed.board.revealed, game.board.revealed)
+            self.assertEqual(replayed.winner(), game.winner())
+
+    def test_every_strategy(self):
+        for name in helpers.STRATEGIES:
+            for seed in range(10):
+                game, recorder = helpers.play_recorded(seed, strategy=name)
+                self.assertEqual(recorder.log.strategy, name)
+                self.check_replays(game, recorder.log)
+
+    def test_strategy_changes(self):
+        for seed in range(10):
+            game, recorder = helpers.play_recorded(seed, switches=0.3)
+            self.assertTrue(recorder.log.switches)
+            self.check_replays(game, recorder.log)
+
+    def test_time_budget_overruns(self):
+        overruns = 0
+        for seed in range(10):
+            game, recorder = helpers.play_recorded(seed, strategy='density', tight_budget=True)
+            overruns += len(recorder.log.overruns)
+            self.check_replays(game, recorder.log)
+
+        # Without NumPy the density strategy gives way at once, in time
+        if helpers.battleship_strategies.battleship_density.numpy is not None:
+            self.assertTrue(overruns)
+
+    def test_undone_turns(self):
+        for seed in range(10):
+            game, recorder = helpers.play_recorded(seed, strategy=helpers.STRATEGIES[seed % 3], switches=0.2,
+                                                   undos=0.2, tight_budget=True)
+            self.check_replays(game, recorder.log)
+
+    def test_turns_played_on_a_copy(self):
+        for seed in range(10):
+            game, recorder = helpers.play_recorded(seed, strategy=helpers.STRATEGIES[seed % 3], switches=0.1,
+                                                   threaded=True, tight_budget=True)
+            self.check_replays(game, recorder.log)
+
+    def test_mismatch(self):
+        game, recorder = helpers.play_recorded(0)
+        log = recorder.log
+
+        # COM's first shot moved to another coord
+        index = next(index for index, (side, cell) in enumerate(log.shots) if side == USER)
+        taken = set(cell for side, cell in log.shots if side == USER)
+        log.shots[index] = (USER, next(cell for cell in range(game.board.cells) if cell not in taken))
+
+        with self.assertRaises(battleship_replay.ReplayMismatch) as context:
+            battleship_replay.replay(log, simulate=True)
+        self.assertEqual(context.exception.index, index)
+
+
+if __name__ == '__main__':
+    unittest.main()
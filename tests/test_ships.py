@@ -0,0 +1,78 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_ships.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Ship index: every sunk ship is told by the shot that sinks it, and layouts given as masks are split into
+       their ships
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import random
+import unittest
+
+import helpers
+
+import battleship_engine
+import battleship_layouts
+from battleship_engine import USER
+
+
+class Observer(battleship_engine.GameListener):
+
+    def __init__(self):
+        self.shots = []
+
+    def on_turn(self, game, shots):
+        self.shots.extend(shots)
+
+
+class SunkTest(unittest.TestCase):
+
+    def test_sunk_ships(self):
+        for seed in range(20):
+            game = helpers.new_game(seed)
+            observer = Observer()
+            game.subscribe(observer)
+            while not game.game_is_over():
+                game.com_fires()
+
+            sunk = [shot.sunk for shot in observer.shots if shot.sunk]
+            self.assertEqual(sorted(sunk), sorted(game.board.ships[USER]))
+
+            for shot in observer.shots:
+                if shot.sunk:
+                    self.assertTrue(shot.hit)
+                    self.assertTrue(shot.sunk >> game.board.index(shot.row, shot.column) & 1)
+
+            # Every boat COM looked for has been found
+            self.assertEqual(sum(game.boats.values()), 0)
+
+    def test_ships_from_masks(self):
+        # Layouts given as masks are split into their ships
+        for seed in range(20):
+            ships = battleship_layouts.random_fleet(10, battleship_engine.boatDict, random.Random(seed))
+            layout = 0
+            for ship in ships:
+                layout |= ship
+
+            game = battleship_engine.Game(10)
+            game.set_layout_masks(layout, layout)
+            self.assertEqual(sorted(game.board.ships[USER]), sorted(ships))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_sizes.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Boards of any size: the scaled fleet always fits, and boards too small for a game are refused
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import random
+import unittest
+
+import helpers
+
+import battleship_engine
+import battleship_layouts
+from battleship_engine import USER, COM
+
+
+class FleetTest(unittest.TestCase):
+
+    def test_every_size_gets_a_fleet_that_fits(self):
+        for size in range(2, 31):
+            fleet = battleship_layouts.scaled_fleet(battleship_engine.boatDict, size)
+            self.assertTrue(fleet)
+            game = battleship_engine.Game(size, fleet, rng=random.Random(size))
+            game.set_board()
+            self.assertNotEqual(game.board.boats[USER], game.board.boats[COM])
+            self.assertEqual(sorted(battleship_engine.popcount(ship) for ship in game.board.ships[USER]),
+                             sorted(battleship_layouts.fleet_lengths(fleet)))
+
+    def test_big_boards_play_to_the_end(self):
+        for size in (50, 100):
+            game = helpers.new_game(size, size)
+            while not game.game_is_over():
+                game.com_fires()
+            self.assertEqual(game.winner(), COM)
+
+    def test_boards_without_boats(self):
+        self.assertEqual(battleship_layouts.scaled_fleet(battleship_engine.boatDict, 1), {})
+        self.assertRaises(ValueError, battleship_engine.Game(1, {}).set_board)
+
+    def test_few_layouts(self):
+        # A single boat of 2 fits only 4 ways on a 2x2 board, and both sides still get different layouts
+        game = battleship_engine.Game(2, {'2_boat': 1}, rng=random.Random(0))
+        game.set_board()
+        self.assertNotEqual(game.board.boats[USER], game.board.boats[COM])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_state.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Games saved in the script resume exactly where they were, and the masks they store go to bytes and back
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import random
+import unittest
+
+import helpers
+
+import battleship_layouts
+import battleship_state
+
+
+class MaskBytesTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        rng = random.Random(0)
+        for size in (1, 3, 10, 17, 100):
+            n_bytes = battleship_layouts.mask_bytes(size)
+            for _ in range(20):
+                mask = rng.getrandbits(size * size)
+                data = battleship_layouts.mask_to_bytes(mask, n_bytes)
+                self.assertEqual(len(data), n_bytes)
+                self.assertEqual(battleship_layouts.mask_from_bytes(data), mask)
+
+
+class SavedGameTest(unittest.TestCase):
+
+    def test_resumed_game_goes_on_the_same(self):
+        for seed in range(10):
+            game, recorder = helpers.play_recorded(seed, strategy=helpers.STRATEGIES[seed % 3], shots=15)
+            if game.game_is_over():
+                continue
+
+            text = battleship_state.dumps(battleship_state.SavedGame(game, True, 1234, recorder.log.to_bytes()))
+            saved = battleship_state.loads(text, helpers.make_strategy(game.strategy.name))
+            resumed = saved.game
+
+            self.assertTrue(saved.show_user_boats)
+            self.assertEqual(saved.dag_color, 1234)
+            self.assertEqual(saved.replay, recorder.log.to_bytes())
+            self.assertEqual(resumed.board.state(), game.board.state())
+            self.assertEqual(resumed.boats, game.boats)
+            self.assertEqual(resumed.shot_count, game.shot_count)
+
+            # Both games play the rest the same way
+            rng = random.Random(seed)
+            other_rng = random.Random(seed)
+            while not game.game_is_over():
+                helpers.user_turn(game, rng)
+                helpers.user_turn(resumed, other_rng)
+                self.assertEqual(resumed.board.state(), game.board.state())
+
+    def test_not_a_saved_game(self):
+        self.assertRaises(battleship_state.StateError, battleship_state.loads, 'not base64 at all!')
+        self.assertRaises(battleship_state.StateError, battleship_state.loads, 'QkFEIQ==')
+
+
+if __name__ == '__main__':
+    unittest.main()
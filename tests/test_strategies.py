@@ -0,0 +1,57 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_strategies.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Pluggable strategies: copies of the game get their own strategy, which observes every shot of COM once
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import unittest
+
+import helpers
+
+import battleship_engine
+from battleship_engine import USER
+
+
+class CountingStrategy(battleship_engine.Strategy):
+    name = 'counting'
+
+    def __init__(self):
+        self.observed = []
+
+    def observe(self, game, shot):
+        self.observed.append((shot.row, shot.column))
+
+
+class StrategyTest(unittest.TestCase):
+
+    def test_strategy_observes_once(self):
+        game = helpers.new_game(1)
+        game.strategy = CountingStrategy()
+        while not game.game_is_over():
+            engine = game.copy()
+            self.assertIsNot(engine.strategy, game.strategy)
+            shots = engine.com_fires()
+            game.apply_turn(shots, engine.rng.getstate(), engine.strategy)
+
+        self.assertEqual(len(game.strategy.observed), battleship_engine.popcount(game.board.revealed[USER]))
+        self.assertIs(battleship_engine.HEURISTIC.copy(), battleship_engine.HEURISTIC)
+
+
+if __name__ == '__main__':
+    unittest.main()
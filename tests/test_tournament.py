@@ -0,0 +1,87 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_tournament.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Tournament runner: fixed layouts (also picked from a layout bank), and workers that fail stop the tournament
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import helpers
+
+import battleship_bank
+import battleship_engine
+import battleship_layouts
+import battleship_tournament
+from battleship_engine import USER
+
+
+class TournamentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp(prefix='bShip_tests_')
+        self.path = os.path.join(self.folder, 'layouts.bslb')
+        battleship_bank.build(self.path, 10, battleship_layouts.scaled_fleet(battleship_engine.boatDict, 10), 50,
+                              random.Random(0))
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_fixed_layout(self):
+        layouts = set()
+        for seed in range(5):
+            game = battleship_engine.Game(10, rng=random.Random(seed))
+            battleship_tournament.set_layouts(game, 7)
+            layouts.add(game.board.boats[USER])
+        self.assertEqual(len(layouts), 1)
+
+    def test_fixed_layout_from_the_bank(self):
+        bank = battleship_bank.LayoutBank(self.path)
+        try:
+            in_bank = set(bank.layout(index) for index in range(len(bank)))
+            layouts = set()
+            for seed in range(5):
+                game = battleship_engine.Game(10, rng=random.Random(seed), bank=bank)
+                battleship_tournament.set_layouts(game, 7, bank)
+                layouts.add(game.board.boats[USER])
+                self.assertIn(game.board.boats[USER], in_bank)
+            self.assertEqual(len(layouts), 1)
+        finally:
+            bank.close()
+
+    def test_tournament(self):
+        for processes, strategy in zip((1, 2, 2), helpers.STRATEGIES):
+            text = battleship_tournament.run_tournament(20, strategy, processes, layout=3, chunk_size=5,
+                                                        bank_path=self.path)
+            self.assertIn('20 games', text)
+            self.assertIn('COM strategy: {}'.format(strategy), text)
+
+    def test_failing_worker(self):
+        # The pool is stopped and the error reaches the caller
+        missing = os.path.join(self.folder, 'missing.bslb')
+        for processes in (1, 2):
+            self.assertRaises((IOError, OSError), battleship_tournament.run_tournament, 10, processes=processes,
+                              chunk_size=5, bank_path=missing)
+
+
+if __name__ == '__main__':
+    unittest.main()
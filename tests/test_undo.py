@@ -0,0 +1,71 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_undo.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: Snapshots and undo: undoing a turn goes back to the exact game before it, up to the depth of the history
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import random
+import unittest
+
+import helpers
+
+import battleship_engine
+
+
+class UndoTest(unittest.TestCase):
+
+    def test_undo_goes_back(self):
+        for seed in range(20):
+            game = helpers.new_game(seed, strategy=helpers.STRATEGIES[seed % 3])
+            rng = random.Random(seed)
+            for _ in range(10):
+                helpers.user_turn(game, rng)
+            if game.game_is_over():
+                continue
+
+            before = game.snapshot()
+            candidates = game.candidates.count
+            turn_rng = random.Random(seed + 1)
+            helpers.user_turn(game, random.Random(seed + 1))
+            after = game.snapshot()
+
+            self.assertTrue(game.undo())
+            self.assertEqual(game.snapshot(), before)
+            self.assertEqual(game.candidates.count, candidates)
+
+            # The same shot plays the same turn again
+            helpers.user_turn(game, turn_rng)
+            self.assertEqual(game.snapshot(), after)
+
+    def test_undo_depth(self):
+        game = helpers.new_game(0)
+        game.history = battleship_engine.deque(maxlen=3)
+        rng = random.Random(0)
+        for _ in range(5):
+            helpers.user_turn(game, rng)
+
+        undone = 0
+        while game.undo():
+            undone += 1
+        self.assertEqual(undone, 3)
+        self.assertFalse(game.can_undo())
+
+
+if __name__ == '__main__':
+    unittest.main()
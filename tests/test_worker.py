@@ -0,0 +1,45 @@
+# -*- coding: UTF-8 -*-
+'''
+Author: Jaime Rivera
+File: tests/test_worker.py
+Date: 2018.09.23
+Revision: 2018.09.23
+Copyright: Copyright Jaime Rivera 2018 | www.jaimervq.com
+           The program(s) herein may be used, modified and/or distributed in accordance with the terms and conditions
+           stipulated in the Creative Commons license under which the program(s) have been registered. (CC BY-SA 4.0)
+
+Brief: COM's turn played on a copy of the game, as the worker thread does, is the turn the game itself
+       would have played
+
+'''
+
+__author__ = 'Jaime Rivera <jaime.rvq@gmail.com>'
+__copyright__ = 'Copyright 2018, Jaime Rivera'
+__credits__ = []
+__license__ = 'Creative Commons Attribution-ShareAlike 4.0 International (CC BY-SA 4.0)'
+__maintainer__ = 'Jaime Rivera'
+__email__ = 'jaime.rvq@gmail.com'
+__status__ = 'Testing'
+
+import unittest
+
+import helpers
+
+
+class WorkerTurnTest(unittest.TestCase):
+
+    def test_turn_on_a_copy(self):
+        # A turn played on a copy and applied is the turn the game would have played
+        for seed in range(10):
+            game = helpers.new_game(seed)
+            other = helpers.new_game(seed)
+            while not game.game_is_over():
+                engine = game.copy()
+                shots = engine.com_fires()
+                game.apply_turn(shots, engine.rng.getstate(), engine.strategy)
+                other.com_fires()
+                self.assertEqual(game.board.state(), other.board.state())
+
+
+if __name__ == '__main__':
+    unittest.main()